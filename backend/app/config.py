@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import cached_property, lru_cache
 from typing import List
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -11,13 +12,21 @@ class Settings(BaseSettings):
     jwt_secret: str = "change_me"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24
+    password_hash_rounds: int = 29000
     allowed_origins: str = "http://localhost:5173"
     groq_api_key: str = ""
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @cached_property
     def allowed_origin_list(self) -> List[str]:
         return [origin.strip() for origin in self.allowed_origins.split(",") if origin.strip()]
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, built (and .env parsed) once."""
+    return Settings()
+
+
+settings = get_settings()
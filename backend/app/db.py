@@ -1,4 +1,6 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from __future__ import annotations
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from urllib.parse import quote_plus
 
 from .config import settings
@@ -6,10 +8,23 @@ from .config import settings
 from pymongo.errors import InvalidURI
 
 
+# Pool sized for a single API worker; zstd shrinks the large nested
+# schemaHistory documents on the wire (zlib is the fallback if the server
+# doesn't support zstd).
+_CLIENT_OPTIONS = {
+    "maxPoolSize": 50,
+    "minPoolSize": 10,
+    "maxIdleTimeMS": 30000,
+    "compressors": "zstd,zlib",
+    "retryWrites": True,
+    "appname": "mongoarchitect",
+}
+
+
 def _build_safe_client(uri: str) -> AsyncIOMotorClient:
     # Try raw URI first
     try:
-        return AsyncIOMotorClient(uri)
+        return AsyncIOMotorClient(uri, **_CLIENT_OPTIONS)
     except InvalidURI:
         # Attempt to URL-encode userinfo if present
         safe_uri = uri
@@ -30,15 +45,45 @@ def _build_safe_client(uri: str) -> AsyncIOMotorClient:
                 user_e = quote_plus(user)
                 pwd_e = quote_plus(pwd)
                 safe_uri = prefix + f"{user_e}:{pwd_e}@{after}"
-                return AsyncIOMotorClient(safe_uri)
+                return AsyncIOMotorClient(safe_uri, **_CLIENT_OPTIONS)
 
         # If we couldn't fix it, re-raise the original error for visibility
         raise
 
 
-# Initialize Motor client (attempt safe reconstruction on InvalidURI)
-_client = _build_safe_client(settings.mongodb_uri)
+_client: AsyncIOMotorClient | None = None
+_db: AsyncIOMotorDatabase | None = None
+
+
+def connect() -> None:
+    """Create the Motor client (attempt safe reconstruction on InvalidURI).
+
+    Called from the app lifespan so the client binds to the running loop.
+    """
+    global _client, _db
+    if _client is None:
+        _client = _build_safe_client(settings.mongodb_uri)
+        _db = _client[settings.database_name]
+
+
+def close() -> None:
+    global _client, _db
+    if _client is not None:
+        _client.close()
+        _client = None
+        _db = None
+
+
+async def ensure_indexes() -> None:
+    """Create the indexes behind the per-user schemaHistory lookups (idempotent)."""
+    database = get_db()
+    await database.schemaHistory.create_index([("userId", 1), ("_id", 1)])
+    await database.schemaHistory.create_index([("userId", 1), ("createdAt", -1)])
 
 
-def get_db():
-    return _client[settings.database_name]
+def get_db() -> AsyncIOMotorDatabase:
+    # Handlers call this per request; hand back the handle built at connect()
+    # rather than constructing a new database object each time.
+    if _db is None:
+        connect()
+    return _db
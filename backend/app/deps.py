@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from bson import ObjectId
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
@@ -10,20 +15,86 @@ from .utils import serialize_doc, to_object_id
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Authenticated user docs keyed by user id. Token validity (signature and
+# expiry) is checked on every request; only the Mongo lookup is cached.
+USER_CACHE_SIZE = 4096
+USER_CACHE_TTL = 60
+
+# Request handlers never need the password hash; change_password reads it
+# itself so it never sits in the shared user cache.
+USER_PROJECTION = {"passwordHash": 0}
+
+# The analysis services only read the stored result and the original prompt.
+ANALYSIS_PROJECTION = {"result": 1, "inputText": 1}
+
+_user_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
 
 def _unauthorized(detail: str):
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
 
 
+def _cached_user(user_id: str) -> Dict[str, Any] | None:
+    entry = _user_cache.get(user_id)
+    if entry is None:
+        return None
+    user, expires_at = entry
+    if expires_at <= time.time():
+        _user_cache.pop(user_id, None)
+        return None
+    _user_cache.move_to_end(user_id)
+    return dict(user)
+
+
+def _cache_user(user_id: str, user: Dict[str, Any]) -> None:
+    _user_cache[user_id] = (dict(user), time.time() + USER_CACHE_TTL)
+    _user_cache.move_to_end(user_id)
+    if len(_user_cache) > USER_CACHE_SIZE:
+        _user_cache.popitem(last=False)
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Drop the cached user doc so the next request reloads it from Mongo."""
+    _user_cache.pop(user_id, None)
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     user_id = decode_access_token(token)
     if not user_id:
         _unauthorized("Invalid token")
+    cached = _cached_user(user_id)
+    if cached is not None:
+        return cached
     object_id = to_object_id(user_id)
     if not object_id:
         _unauthorized("Invalid token")
     db = get_db()
-    user = await db.users.find_one({"_id": object_id})
+    user = await db.users.find_one({"_id": object_id}, projection=USER_PROJECTION)
     if not user:
         _unauthorized("User not found")
-    return serialize_doc(user)
+    user = serialize_doc(user)
+    # Prebuilt /me payload, shared by every request served from the cache
+    user["_me_view"] = {
+        "_id": user["_id"],
+        "email": user.get("email"),
+        "createdAt": user.get("createdAt"),
+    }
+    _cache_user(user_id, user)
+    return dict(user)
+
+
+async def get_user_schema(
+    schema_id: str,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+) -> Dict[str, Any]:
+    """Load a schemaHistory document owned by the current user, or fail with 400/404."""
+    if not ObjectId.is_valid(schema_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid schema ID")
+    schema = await db.schemaHistory.find_one(
+        {"_id": ObjectId(schema_id), "userId": current_user.get("_id")},
+        projection=ANALYSIS_PROJECTION,
+    )
+    if not schema:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schema not found")
+    return schema
@@ -1,22 +1,65 @@
+"""FastAPI application entry point.
+
+Custom middleware must be written as a plain ASGI class
+(``async def __call__(self, scope, receive, send)``); do not subclass
+Starlette's ``BaseHTTPMiddleware``, which wraps every request in extra tasks
+and streams. This is enforced when the app is built.
+"""
+
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
 
+from . import db
+from .services import atlas_export
 from .config import settings
+from .responses import MsgspecJSONResponse
 from .routers import auth, schema, users, agent, compare_schema, export, advisor, evolution, query_latency, access_patterns, cost_estimation
 
 
-app = FastAPI(title="MongoArchitect AI API")
+async def _ensure_indexes() -> None:
+    try:
+        await db.ensure_indexes()
+    except Exception:
+        # Index creation is an optimisation; never block serving on it
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db.connect()
+    index_task = asyncio.create_task(_ensure_indexes())
+    yield
+    index_task.cancel()
+    atlas_export.close_clients()
+    db.close()
+
+
+app = FastAPI(
+    title="MongoArchitect AI API",
+    lifespan=lifespan,
+    default_response_class=MsgspecJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_origin_list(),
+    allow_origins=settings.allowed_origin_list,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
 )
 
+for _middleware in app.user_middleware:
+    if isinstance(_middleware.cls, type) and issubclass(_middleware.cls, BaseHTTPMiddleware):
+        raise RuntimeError(
+            f"{_middleware.cls.__name__} subclasses BaseHTTPMiddleware; write it as a pure ASGI middleware"
+        )
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(schema.router)
@@ -16,14 +16,6 @@ class ChangePassword(BaseModel):
     new_password: str = Field(min_length=8, max_length=72, alias="newPassword")
 
 
-class UserPublic(BaseModel):
-    model_config = ConfigDict(populate_by_name=True)
-
-    id: str = Field(alias="_id")
-    email: EmailStr
-    created_at: datetime = Field(alias="createdAt")
-
-
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -83,26 +75,6 @@ class AgentChatRequest(BaseModel):
     schema_id: Optional[str] = Field(default=None, alias="schemaId")
 
 
-class SchemaCompareRequest(BaseModel):
-    """Request for schema comparison endpoint."""
-    model_config = ConfigDict(populate_by_name=True)
-    
-    schema_id_1: str = Field(alias="schemaId1")
-    schema_id_2: str = Field(alias="schemaId2")
-    analysis_text: str = Field(default="", alias="analysisText")
-
-
-class GenerateAndCompareRequest(BaseModel):
-    """Request for generating and comparing two schemas."""
-    model_config = ConfigDict(populate_by_name=True)
-    
-    input_text_1: str = Field(alias="inputText1")
-    workload_type_1: str = Field(default="balanced", alias="workloadType1")
-    input_text_2: str = Field(alias="inputText2")
-    workload_type_2: str = Field(default="balanced", alias="workloadType2")
-    analysis_text: str = Field(default="", alias="analysisText")
-
-
 class CompareModelsRequest(BaseModel):
     """Request for comparing two different AI models on same requirement."""
     model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from typing import Any
+
+import msgspec
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _enc_hook(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise NotImplementedError(f"Objects of type {type(obj).__name__} are not JSON serializable")
+
+
+_encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+
+
+class MsgspecJSONResponse(JSONResponse):
+    """JSON response rendered by msgspec's C encoder.
+
+    Returning an instance directly from a route also skips FastAPI's
+    ``jsonable_encoder`` walk, which dominates on large Mongo documents.
+    ObjectIds are rendered as strings.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
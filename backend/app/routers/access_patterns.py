@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from typing import Dict, Any
 
-from ..db import get_db
-from ..deps import get_current_user
+from ..deps import get_user_schema
+from ..responses import MsgspecJSONResponse
 from ..services import access_pattern_analyzer
 
 router = APIRouter(prefix="/access-patterns", tags=["access-patterns"])
@@ -10,31 +10,16 @@ router = APIRouter(prefix="/access-patterns", tags=["access-patterns"])
 
 @router.get("/analyze/{schema_id}")
 async def analyze_access_patterns(
-    schema_id: str,
-    current_user: Dict = Depends(get_current_user),
-    db=Depends(get_db)
+    summary_only: bool = False,
+    schema: Dict[str, Any] = Depends(get_user_schema)
 ):
     """
     Analyze access patterns for a schema.
     Shows most filtered fields, updated arrays, rarely queried fields, and write-heavy collections.
+    Pass summary_only=true to get just the summary block.
     """
-    from bson import ObjectId
-    
-    try:
-        schema_obj_id = ObjectId(schema_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid schema ID")
-    
-    # Get schema from database
-    schema = await db.schemaHistory.find_one({
-        "_id": schema_obj_id,
-        "userId": current_user.get("_id")
-    })
-    
-    if not schema:
-        raise HTTPException(status_code=404, detail="Schema not found")
-    
     # Analyze access patterns
-    analysis = access_pattern_analyzer.analyze_access_patterns(schema)
+    analysis = access_pattern_analyzer.analyze_access_patterns(schema, summary_only=summary_only)
     
-    return analysis
+    # Plain JSON-native dicts; encode directly instead of walking them with jsonable_encoder
+    return MsgspecJSONResponse(analysis)
@@ -3,15 +3,16 @@
 from __future__ import annotations
 
 from typing import Annotated
-from datetime import datetime
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends
-from bson import ObjectId
+from fastapi.concurrency import run_in_threadpool
 
 from ..models import AgentChatRequest, AgentChatResponse
 from ..deps import get_current_user
 from ..services.agent_engine import get_or_create_agent, delete_agent
 from ..db import get_db
+from ..utils import to_object_id
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
@@ -36,20 +37,26 @@ async def chat_with_agent(
     # Get or create agent for this user
     agent = get_or_create_agent(user_id)
     
-    # If schema_id is provided, fetch the schema for context
+    # If schema_id is provided, fetch the schema for context; the same
+    # document is reused as the parent when saving a refinement below
+    parent_doc = None
     current_schema = None
-    if request.schema_id:
+    schema_object_id = to_object_id(request.schema_id) if request.schema_id else None
+    if schema_object_id:
         try:
-            schema_doc = await db.schemaHistory.find_one({"_id": ObjectId(request.schema_id)})
-            if schema_doc:
-                current_schema = schema_doc.get("result")
+            parent_doc = await db.schemaHistory.find_one({"_id": schema_object_id, "userId": user_id})
+            if parent_doc:
+                current_schema = parent_doc.get("result")
         except Exception:
             # If schema lookup fails, proceed without context
             pass
     
     # Get agent response - wrap in try-except for proper error handling
     try:
-        response = agent.chat(user_message=request.message, current_schema=current_schema)
+        # agent.chat makes a blocking LLM call; keep it off the event loop
+        response = await run_in_threadpool(
+            agent.chat, user_message=request.message, current_schema=current_schema
+        )
     except Exception as e:
         return AgentChatResponse(
             user_msg=request.message,
@@ -62,28 +69,26 @@ async def chat_with_agent(
     
     # If action is GENERATE_SCHEMA or REFINE_SCHEMA, save to database
     schema_id_to_return = None
-    if response.get("schema") and request.schema_id:
+    if response.get("schema") and parent_doc:
         try:
             # Update existing schema with new version
-            schema_doc = await db.schemaHistory.find_one({"_id": ObjectId(request.schema_id)})
-            if schema_doc:
-                new_version = (schema_doc.get("version", 1) or 1) + 1
-                root_id = schema_doc.get("rootId") or request.schema_id
-                
-                new_schema_doc = {
-                    "userId": user_id,
-                    "inputText": schema_doc.get("inputText", request.message),
-                    "workloadType": schema_doc.get("workloadType", "mixed"),
-                    "result": response["schema"],
-                    "createdAt": datetime.utcnow(),
-                    "version": new_version,
-                    "parentId": request.schema_id,
-                    "refinementText": request.message,
-                    "rootId": root_id
-                }
-                
-                result = await db.schemaHistory.insert_one(new_schema_doc)
-                schema_id_to_return = str(result.inserted_id)
+            new_version = (parent_doc.get("version", 1) or 1) + 1
+            root_id = parent_doc.get("rootId") or request.schema_id
+            
+            new_schema_doc = {
+                "userId": user_id,
+                "inputText": parent_doc.get("inputText", request.message),
+                "workloadType": parent_doc.get("workloadType", "mixed"),
+                "result": response["schema"],
+                "createdAt": datetime.now(timezone.utc),
+                "version": new_version,
+                "parentId": request.schema_id,
+                "refinementText": request.message,
+                "rootId": root_id
+            }
+            
+            result = await db.schemaHistory.insert_one(new_schema_doc)
+            schema_id_to_return = str(result.inserted_id)
         except Exception:
             # If save fails, still return response
             pass
@@ -96,7 +101,7 @@ async def chat_with_agent(
                 "inputText": request.message,
                 "workloadType": "mixed",
                 "result": response["schema"],
-                "createdAt": datetime.utcnow(),
+                "createdAt": datetime.now(timezone.utc),
                 "version": 1
             }
             
@@ -6,7 +6,12 @@ from fastapi import APIRouter, HTTPException, status
 
 from ..db import get_db
 from ..models import Token, UserCreate
-from ..security import create_access_token, hash_password, verify_password
+from ..security import (
+    DUMMY_PASSWORD_HASH,
+    create_access_token,
+    hash_password_async,
+    verify_password_async,
+)
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -25,7 +30,7 @@ async def signup(payload: UserCreate):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     doc = {
         "email": payload.email,
-        "passwordHash": hash_password(payload.password),
+        "passwordHash": await hash_password_async(payload.password),
         "createdAt": datetime.now(timezone.utc),
     }
     result = await db.users.insert_one(doc)
@@ -42,7 +47,10 @@ async def login(payload: UserCreate):
         )
     db = get_db()
     user = await db.users.find_one({"email": payload.email})
-    if not user or not verify_password(payload.password, user.get("passwordHash", "")):
+    # Unknown emails verify against a dummy hash so they take as long as wrong passwords
+    password_hash = user.get("passwordHash", "") if user else DUMMY_PASSWORD_HASH
+    verified = await verify_password_async(payload.password, password_hash)
+    if not user or not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     token = create_access_token(str(user["_id"]))
     return {"access_token": token, "token_type": "bearer"}
@@ -6,10 +6,8 @@ Endpoints for MongoDB Atlas cost estimation and optimization recommendations.
 
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any
-from bson import ObjectId
 
-from ..db import get_db
-from ..deps import get_current_user
+from ..deps import get_user_schema
 from ..services.cost_estimator import estimate_atlas_costs
 
 
@@ -19,8 +17,7 @@ router = APIRouter(prefix="/cost-estimate", tags=["cost-estimation"])
 @router.get("/analyze/{schema_id}")
 async def analyze_cost_projection(
     schema_id: str,
-    current_user: Dict[str, Any] = Depends(get_current_user),
-    db=Depends(get_db)
+    schema: Dict[str, Any] = Depends(get_user_schema)
 ):
     """
     Generate Atlas cost projections for a schema over 12 months.
@@ -32,19 +29,6 @@ async def analyze_cost_projection(
         - Optimization recommendations
     """
     try:
-        # Validate schema_id format
-        if not ObjectId.is_valid(schema_id):
-            raise HTTPException(status_code=400, detail="Invalid schema ID format")
-        
-        # Fetch schema from database
-        schema = await db.schemaHistory.find_one({
-            "_id": ObjectId(schema_id),
-            "userId": current_user.get("_id")
-        })
-        
-        if not schema:
-            raise HTTPException(status_code=404, detail="Schema not found")
-        
         # Estimate costs
         cost_analysis = estimate_atlas_costs(schema)
         
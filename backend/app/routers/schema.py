@@ -2,13 +2,15 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
+from bson import ObjectId
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from ..db import get_db
 from ..deps import get_current_user
 from ..models import SchemaRefineRequest, SchemaRequest
+from ..responses import MsgspecJSONResponse
 from ..services.schema_engine import apply_refinement, generate_schema
-from ..utils import serialize_doc, serialize_docs, to_object_id
+from ..utils import serialize_doc, to_object_id
 
 
 router = APIRouter(prefix="/schemas", tags=["schemas"])
@@ -17,22 +19,21 @@ router = APIRouter(prefix="/schemas", tags=["schemas"])
 @router.post("/generate")
 async def create_schema(payload: SchemaRequest, current_user=Depends(get_current_user)):
     result = generate_schema(payload.input_text, payload.workload_type)
+    # Allocate the id client-side so rootId is written with the insert itself
+    new_id = ObjectId()
     doc = {
+        "_id": new_id,
         "userId": current_user.get("_id"),
         "inputText": payload.input_text,
         "workloadType": payload.workload_type,
         "result": result,
         "createdAt": datetime.now(timezone.utc),
         "version": 1,
+        "rootId": str(new_id),
     }
     db = get_db()
-    insert_result = await db.schemaHistory.insert_one(doc)
-    doc["_id"] = str(insert_result.inserted_id)
-    doc["rootId"] = doc["_id"]
-    await db.schemaHistory.update_one(
-        {"_id": insert_result.inserted_id},
-        {"$set": {"rootId": doc["_id"]}},
-    )
+    await db.schemaHistory.insert_one(doc)
+    doc["_id"] = str(new_id)
     return doc
 
 
@@ -70,18 +71,22 @@ async def refine_schema(payload: SchemaRefineRequest, current_user=Depends(get_c
 @router.get("/history")
 async def get_history(current_user=Depends(get_current_user)):
     db = get_db()
-    cursor = db.schemaHistory.find({"userId": current_user.get("_id")}).sort("createdAt", -1)
-    docs = await cursor.to_list(length=200)
-    seen_roots = set()
-    grouped = []
-    for doc in docs:
-        root_id = str(doc.get("rootId") or doc.get("_id"))
-        if root_id in seen_roots:
-            continue
-        doc["rootId"] = root_id
-        grouped.append(doc)
-        seen_roots.add(root_id)
-    return serialize_docs(grouped)
+    # Keep only the newest version of each schema lineage among the 200 most
+    # recent versions, grouped server-side. The $match/$sort walk the
+    # (userId, createdAt) index and the $limit bounds what $group has to hold.
+    pipeline = [
+        {"$match": {"userId": current_user.get("_id")}},
+        {"$sort": {"createdAt": -1}},
+        {"$limit": 200},
+        {"$group": {
+            "_id": {"$ifNull": ["$rootId", {"$toString": "$_id"}]},
+            "doc": {"$first": "$$ROOT"},
+        }},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": ["$doc", {"rootId": "$_id"}]}}},
+        {"$sort": {"createdAt": -1}},
+    ]
+    grouped = await db.schemaHistory.aggregate(pipeline).to_list(length=200)
+    return MsgspecJSONResponse(grouped)
 
 
 @router.get("/{schema_id}")
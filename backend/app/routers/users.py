@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from ..db import get_db
-from ..deps import get_current_user
+from ..deps import get_current_user, invalidate_user_cache
 from ..models import ChangePassword
-from ..security import hash_password, verify_password
+from ..security import hash_password_async, verify_password_async
+from ..utils import to_object_id
 
 
 router = APIRouter(tags=["users"])
@@ -13,11 +16,7 @@ router = APIRouter(tags=["users"])
 
 @router.get("/me")
 async def get_me(current_user=Depends(get_current_user)):
-    return {
-        "_id": current_user.get("_id"),
-        "email": current_user.get("email"),
-        "createdAt": current_user.get("createdAt"),
-    }
+    return current_user["_me_view"]
 
 
 @router.put("/me/password")
@@ -25,20 +24,32 @@ async def change_password(
     payload: ChangePassword,
     current_user=Depends(get_current_user)
 ):
-    # Verify current password
-    current_hash = current_user.get("passwordHash", "")
-    if not verify_password(payload.current_password, current_hash):
+    db = get_db()
+    user_object_id = to_object_id(current_user.get("_id"))
+    stored = await db.users.find_one({"_id": user_object_id}, projection={"passwordHash": 1})
+    current_hash = (stored or {}).get("passwordHash", "")
+
+    # Verify current password and hash the new one concurrently
+    verified, new_hash = await asyncio.gather(
+        verify_password_async(payload.current_password, current_hash),
+        hash_password_async(payload.new_password),
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect",
         )
     
-    # Hash and update new password
-    new_hash = hash_password(payload.new_password)
-    db = get_db()
-    await db.users.update_one(
-        {"_id": current_user.get("_id")},
-        {"$set": {"passwordHash": new_hash}}
+    # Update new password only if the hash we verified is still current
+    result = await db.users.update_one(
+        {"_id": user_object_id, "passwordHash": current_hash},
+        {"$set": {"passwordHash": new_hash}, "$currentDate": {"passwordChangedAt": True}}
     )
+    if result.matched_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Password was changed by another request; please try again",
+        )
+    invalidate_user_cache(current_user.get("_id"))
     
     return {"message": "Password changed successfully"}
@@ -1,37 +1,176 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import anyio
+import anyio.to_thread
+import jwt
+import msgspec
 
 from .config import settings
 
 
-_pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Hashes use passlib's pbkdf2_sha256 format ($pbkdf2-sha256$rounds$salt$checksum,
+# "ab64" base64: "." instead of "+", no padding) so existing users keep verifying.
+_HASH_PREFIX = "$pbkdf2-sha256$"
+# PBKDF2 is CPU-bound: more concurrent threads than cores only adds contention,
+# and a dedicated limiter keeps KDF bursts from starving other threadpool work.
+_KDF_LIMITER = anyio.CapacityLimiter(os.cpu_count() or 1)
+_SALT_BYTES = 16
+_KEY_BYTES = 32
+
+
+def _ab64_encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=").replace("+", ".")
+
+
+def _ab64_decode(data: str) -> bytes:
+    data = data.replace(".", "+")
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _pbkdf2(password: bytes, salt: bytes, rounds: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password, salt, rounds, dklen=_KEY_BYTES)
 
 
 def hash_password(password: str) -> str:
-    if len(password.encode("utf-8")) > 72:
+    password_bytes = password.encode("utf-8")
+    if len(password_bytes) > 72:
         raise ValueError("Password must be 72 bytes or fewer")
-    return _pwd_context.hash(password)
+    rounds = settings.password_hash_rounds
+    salt = os.urandom(_SALT_BYTES)
+    checksum = _pbkdf2(password_bytes, salt, rounds)
+    return f"{_HASH_PREFIX}{rounds}${_ab64_encode(salt)}${_ab64_encode(checksum)}"
+
+
+def _parse_hash(password_hash: str) -> Tuple[int, bytes, bytes] | None:
+    if not password_hash.startswith(_HASH_PREFIX):
+        return None
+    try:
+        rounds, salt, checksum = password_hash[len(_HASH_PREFIX):].split("$")
+        parsed = (int(rounds), _ab64_decode(salt), _ab64_decode(checksum))
+    except (ValueError, binascii.Error):
+        return None
+    if parsed[0] < 1:
+        return None
+    return parsed
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    if len(password.encode("utf-8")) > 72:
-        return False
-    return _pwd_context.verify(password, password_hash)
+    # Every input does the same work: oversized passwords and missing or
+    # malformed stored hashes still run a full KDF (against the dummy hash)
+    # and a constant-time compare, and the flags are combined without branching.
+    password_bytes = password.encode("utf-8")
+    length_ok = len(password_bytes) <= 72
+    parsed = _parse_hash(password_hash)
+    hash_ok = parsed is not None
+    rounds, salt, expected = parsed if hash_ok else _DUMMY_HASH_PARTS
+    computed = _pbkdf2(password_bytes, salt, rounds)
+    return hmac.compare_digest(computed, expected) & length_ok & hash_ok
+
+
+# Hash of a random password, computed at import: warms up the KDF path before
+# the first real login and gives callers something to verify against when
+# there is no stored hash (unknown user, malformed record).
+DUMMY_PASSWORD_HASH = hash_password(secrets.token_urlsafe(32))
+_DUMMY_HASH_PARTS = _parse_hash(DUMMY_PASSWORD_HASH)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password in a worker thread, so the KDF never blocks the event loop."""
+    return await anyio.to_thread.run_sync(hash_password, password, limiter=_KDF_LIMITER)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """verify_password in a worker thread, so the KDF never blocks the event loop."""
+    return await anyio.to_thread.run_sync(
+        verify_password, password, password_hash, limiter=_KDF_LIMITER
+    )
 
 
 def create_access_token(subject: str) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
-    payload = {"sub": subject, "exp": expire}
-    return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+    payload = {"sub": subject, "exp": int(time.time()) + _TOKEN_TTL_SECONDS}
+    return _jwt.encode(payload, _JWT_KEY, algorithm=settings.jwt_algorithm)
 
 
-def decode_access_token(token: str) -> str | None:
+class _MsgspecJWT(jwt.PyJWT):
+    """PyJWT with the claims JSON handled by msgspec instead of stdlib json.
+
+    The overridden hooks are private; requirements.txt pins PyJWT to the
+    releases they were checked against (2.7 - 2.15).
+    """
+
+    def _encode_payload(
+        self,
+        payload: Dict[str, Any],
+        headers: Dict[str, Any] | None = None,
+        json_encoder: Any = None,
+    ) -> bytes:
+        return msgspec.json.encode(payload)
+
+    def _decode_payload(self, decoded: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            payload = msgspec.json.decode(decoded["payload"])
+        except msgspec.DecodeError as e:
+            raise jwt.DecodeError(f"Invalid payload string: {e}") from e
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+_jwt = _MsgspecJWT()
+_JWT_KEY = settings.jwt_secret.encode("utf-8")
+_TOKEN_TTL_SECONDS = settings.access_token_expire_minutes * 60
+
+# Verified payloads keyed by a digest of the token, so raw bearer tokens are
+# not kept in process memory.
+_DECODE_CACHE_SIZE = 2048
+_decode_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+
+def _decode_verified(token: str) -> Dict[str, Any] | None:
+    # Signature check only: a token's claims never change, so the result is
+    # cacheable. Expiry is time-dependent and checked by the caller.
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    payload = _decode_cache.get(key)
+    if payload is not None:
+        _decode_cache.move_to_end(key)
+        return payload
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        return payload.get("sub")
-    except JWTError:
+        payload = _jwt.decode(
+            token,
+            _JWT_KEY,
+            algorithms=[settings.jwt_algorithm],
+            options={"verify_exp": False},
+        )
+    except jwt.PyJWTError:
+        return None
+    _decode_cache[key] = payload
+    if len(_decode_cache) > _DECODE_CACHE_SIZE:
+        _decode_cache.popitem(last=False)
+    return payload
+
+
+def decode_access_token_payload(token: str) -> Dict[str, Any] | None:
+    payload = _decode_verified(token)
+    if payload is None:
+        return None
+    exp = payload.get("exp")
+    if exp is not None and exp <= time.time():
+        return None
+    return dict(payload)
+
+
+def decode_access_token(token: str) -> str | None:
+    payload = decode_access_token_payload(token)
+    if payload is None:
         return None
+    return payload.get("sub")
@@ -1,233 +1,473 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import heapq
+import math
 import random
+import re
+from collections import OrderedDict, defaultdict
 from hashlib import sha256
+from operator import itemgetter
 
+import numpy as np
 
-def analyze_field_access_patterns(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+
+# Keyword groups matched against lower-cased field and collection names.
+_KW_STATUS = 1 << 0
+_KW_CONTACT = 1 << 1
+_KW_ARRAY_NOUN = 1 << 2
+_KW_HOT_ARRAY = 1 << 3
+_KW_FEED_ARRAY = 1 << 4
+_KW_COUNTER = 1 << 5
+_KW_LARGE_TEXT = 1 << 6
+_KW_METADATA = 1 << 7
+_KW_HISTORY = 1 << 8
+_KW_WRITE_HEAVY_COLL = 1 << 9
+_KW_REVIEW_COLL = 1 << 10
+_KW_USER_COLL = 1 << 11
+_KW_ID = 1 << 12
+_KW_SORTABLE = 1 << 13
+_KW_UNIQUE = 1 << 14
+
+_KEYWORD_GROUPS = {
+    _KW_STATUS: ("status", "type", "category", "state"),
+    _KW_CONTACT: ("email", "username", "phone"),
+    _KW_ARRAY_NOUN: ("comment", "review", "item", "tag", "member", "rating", "notification",
+                     "message", "log", "event", "document", "file", "image", "video", "photo"),
+    _KW_HOT_ARRAY: ("comment", "review", "item", "tag", "member"),
+    _KW_FEED_ARRAY: ("log", "notification", "message"),
+    _KW_COUNTER: ("count", "total", "sold", "quantity", "amount", "price", "capacity"),
+    _KW_LARGE_TEXT: ("description", "notes", "bio", "content", "body", "message", "text"),
+    _KW_METADATA: ("metadata", "internal", "legacy", "old", "archived"),
+    _KW_HISTORY: ("history", "log", "audit"),
+    _KW_WRITE_HEAVY_COLL: ("transaction", "event", "log", "ticket", "order"),
+    _KW_REVIEW_COLL: ("review", "comment", "rating"),
+    _KW_USER_COLL: ("user", "profile", "account"),
+    _KW_ID: ("id",),
+    _KW_SORTABLE: ("status", "priority"),
+    _KW_UNIQUE: ("email", "username"),
+}
+
+# Keyword groups matched against lower-cased field type strings.
+_TY_OBJECTID = 1 << 0
+_TY_REF = 1 << 1
+_TY_DATE = 1 << 2
+_TY_TIME = 1 << 3
+_TY_NUMBER = 1 << 4
+_TY_INT = 1 << 5
+
+_TYPE_GROUPS = {
+    _TY_OBJECTID: ("objectid",),
+    _TY_REF: ("ref:",),
+    _TY_DATE: ("date",),
+    _TY_TIME: ("time",),
+    _TY_NUMBER: ("number",),
+    _TY_INT: ("int",),
+}
+
+
+def _build_keyword_matcher(groups: Dict[int, Tuple[str, ...]]):
+    masks: Dict[str, int] = {}
+    for bit, keywords in groups.items():
+        for keyword in keywords:
+            masks[keyword] = masks.get(keyword, 0) | bit
+    
+    # The lookahead reports only the longest keyword starting at each
+    # position, so fold in the groups of every keyword that prefixes it.
+    prefix_masks = {}
+    for keyword in masks:
+        mask = 0
+        for other, other_mask in masks.items():
+            if keyword.startswith(other):
+                mask |= other_mask
+        prefix_masks[keyword] = mask
+    
+    alternation = "|".join(re.escape(k) for k in sorted(masks, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))"), prefix_masks
+
+
+_KEYWORD_RE, _KEYWORD_MASKS = _build_keyword_matcher(_KEYWORD_GROUPS)
+_TYPE_RE, _TYPE_MASKS = _build_keyword_matcher(_TYPE_GROUPS)
+
+# Common non-array fields ending in 's'
+_NON_ARRAY_FIELDS = frozenset({"status", "address", "class", "business", "access", "progress", "process"})
+
+
+def _keyword_mask(text: str) -> int:
+    """Return the bitmask of keyword groups found anywhere in a lower-cased name."""
+    mask = 0
+    for keyword in _KEYWORD_RE.findall(text):
+        mask |= _KEYWORD_MASKS[keyword]
+    return mask
+
+
+def _type_mask(text: str) -> int:
+    """Return the bitmask of _TY_* groups found in a lower-cased type string."""
+    mask = 0
+    for keyword in _TYPE_RE.findall(text):
+        mask |= _TYPE_MASKS[keyword]
+    return mask
+
+
+def _field_features(field: Dict[str, Any]) -> Tuple[str, str, int, int]:
+    """
+    Lower-cased name and type plus keyword and type masks of a field record,
+    cached on the record under private keys.
+    """
+    if "_name_lc" not in field:
+        name_lc = field["field"].lower()
+        type_lc = str(field.get("type", "")).lower()
+        field["_name_lc"] = name_lc
+        field["_type_lc"] = type_lc
+        field["_keywords"] = _keyword_mask(name_lc)
+        field["_types"] = _type_mask(type_lc)
+    return field["_name_lc"], field["_type_lc"], field["_keywords"], field["_types"]
+
+
+def _public_record(field: Dict[str, Any]) -> Dict[str, Any]:
+    """A field record without its cached private keys, for API output."""
+    return {k: v for k, v in field.items() if not k.startswith("_")}
+
+
+def _group_by_collection(fields: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Field records per collection, keeping their order."""
+    grouped = defaultdict(list)
+    for f in fields:
+        grouped[f["collection"]].append(f)
+    return grouped
+
+
+def _first_by_name(fields: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """First (most filtered) field record for each field name."""
+    index: Dict[str, Dict[str, Any]] = {}
+    for f in fields:
+        index.setdefault(f["field"], f)
+    return index
+
+
+def _record_is_array(field: Dict[str, Any]) -> bool:
+    """Array check for a field record, using its precomputed flag when present."""
+    if "_is_array" in field:
+        return field["_is_array"]
+    return is_array_field(field["field"], field["type"])
+
+
+# Inclusive filter-frequency ranges per field category, indexed by the
+# category id returned from _filter_category.
+_FILTER_FREQUENCY_RANGES = np.array([
+    [850, 1000],  # _id and reference fields
+    [600, 850],   # status, type, category fields
+    [400, 700],   # date fields
+    [300, 600],   # email, username lookups
+    [100, 400],   # other strings
+    [50, 300],    # numeric fields
+    [10, 200],    # everything else
+])
+
+
+def _filter_category(field_name: str, field_lower: str, field_str: str, keywords: int) -> int:
+    """Classify a field into a row of _FILTER_FREQUENCY_RANGES."""
+    # _id and reference fields are heavily filtered
+    if field_name == "_id" or "objectid" in field_str or "ref:" in field_str:
+        return 0
+    # Status, type, category fields are commonly filtered
+    if keywords & _KW_STATUS:
+        return 1
+    # Date fields are often used in range queries
+    if "date" in field_str or "time" in field_str or field_lower.endswith("at"):
+        return 2
+    # Email, username are lookup fields
+    if keywords & _KW_CONTACT:
+        return 3
+    # Other string fields moderate filtering
+    if "string" in field_str:
+        return 4
+    # Numeric fields less common
+    if "number" in field_str or "int" in field_str:
+        return 5
+    return 6
+
+
+def _is_array(field_name: str, field_type: Any, field_lower: str, field_str: str, keywords: int) -> bool:
+    """is_array_field() on already normalized inputs."""
+    if field_lower in _NON_ARRAY_FIELDS:
+        return False
+    
+    if "array" in field_str or isinstance(field_type, list):
+        return True
+    
+    return field_name.endswith("s") and bool(keywords & _KW_ARRAY_NOUN)
+
+
+def _percentages(frequencies: Any) -> List[float]:
+    """Daily frequencies as a percentage of 1000/day, capped at 100."""
+    return np.minimum(100.0, np.asarray(frequencies) / 10.0).tolist()
+
+
+def _sort_records(records: List[Dict[str, Any]], keys: Any, descending: bool = False) -> List[Dict[str, Any]]:
+    """Order records by a parallel sequence of sort keys using a stable argsort."""
+    keys = np.asarray(keys)
+    order = np.argsort(-keys if descending else keys, kind="stable")
+    return [records[i] for i in order]
+
+
+def _valid_collections(schema: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Collections whose definition is a field dict; anything else is skipped."""
+    schema_def = schema.get("result", {}).get("schema", {})
+    return [(name, fields) for name, fields in schema_def.items() if isinstance(fields, dict)]
+
+
+def _schema_digest(schema: Dict[str, Any]) -> bytes:
+    schema_str = str(schema.get("result", {}).get("schema", {}))
+    return sha256(schema_str.encode("utf-8")).digest()
+
+
+def _schema_seed(schema: Dict[str, Any], digest: Optional[bytes] = None) -> int:
+    """Deterministic random seed based on schema content."""
+    return int.from_bytes(digest or _schema_digest(schema), "big") % (2**32)
+
+
+class _NormalizedSchema(NamedTuple):
+    """Parallel per-field lists shared by the field-level analyzers."""
+    collections: List[str]
+    fields: List[str]
+    types: List[Any]
+    field_lower: List[str]
+    type_lower: List[str]
+    keywords: List[int]
+
+
+def normalize_schema(
+    schema: Dict[str, Any],
+    collections: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+) -> _NormalizedSchema:
+    """
+    Flatten a schema into parallel lists with lower-cased names and types
+    and keyword masks computed once per field.
+    """
+    normalized = _NormalizedSchema([], [], [], [], [], [])
+    
+    for collection_name, fields in collections if collections is not None else _valid_collections(schema):
+        for field_name, field_type in fields.items():
+            field_lower = field_name.lower()
+            normalized.collections.append(collection_name)
+            normalized.fields.append(field_name)
+            normalized.types.append(field_type)
+            normalized.field_lower.append(field_lower)
+            normalized.type_lower.append(str(field_type).lower())
+            normalized.keywords.append(_keyword_mask(field_lower))
+    
+    return normalized
+
+
+_NORMALIZED_CACHE_SIZE = 16
+_normalized_cache: "OrderedDict[bytes, _NormalizedSchema]" = OrderedDict()
+
+
+def _cached_normalize_schema(
+    schema: Dict[str, Any],
+    digest: bytes,
+    collections: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+) -> _NormalizedSchema:
+    # The schema text fully determines its normalized form, so repeated
+    # analyses of the same schema reuse it. Callers must not mutate it.
+    normalized = _normalized_cache.get(digest)
+    if normalized is not None:
+        _normalized_cache.move_to_end(digest)
+        return normalized
+    normalized = normalize_schema(schema, collections)
+    _normalized_cache[digest] = normalized
+    if len(_normalized_cache) > _NORMALIZED_CACHE_SIZE:
+        _normalized_cache.popitem(last=False)
+    return normalized
+
+
+def analyze_field_access_patterns(
+    schema: Dict[str, Any],
+    normalized: Optional[_NormalizedSchema] = None
+) -> List[Dict[str, Any]]:
     """
     Analyze which fields are most frequently filtered in queries.
     Simulate access patterns based on field characteristics.
     Deterministic: random seed is set based on schema content.
     """
-    # Deterministic random seed based on schema content
-    schema_str = str(schema.get("result", {}).get("schema", {}))
-    seed = int(sha256(schema_str.encode("utf-8")).hexdigest(), 16) % (2**32)
-    random.seed(seed)
+    rng = np.random.default_rng(_schema_seed(schema))
+    norm = normalized or normalize_schema(schema)
     field_patterns = []
-    result = schema.get("result", {})
-    schema_def = result.get("schema", {})
+    category_ids = []
     
-    for collection_name, fields in schema_def.items():
-        if not isinstance(fields, dict):
-            continue
-        
-        for field_name, field_type in fields.items():
-            field_str = str(field_type).lower()
-            
-            # Estimate filter frequency based on field characteristics
-            filter_frequency = 0
-            
-            # _id and reference fields are heavily filtered
-            if field_name == "_id" or "objectid" in field_str or "ref:" in field_str:
-                filter_frequency = random.randint(850, 1000)
-            # Status, type, category fields are commonly filtered
-            elif any(keyword in field_name.lower() for keyword in ["status", "type", "category", "state"]):
-                filter_frequency = random.randint(600, 850)
-            # Date fields are often used in range queries
-            elif "date" in field_str or "time" in field_str or field_name.lower().endswith("at"):
-                filter_frequency = random.randint(400, 700)
-            # Email, username are lookup fields
-            elif any(keyword in field_name.lower() for keyword in ["email", "username", "phone"]):
-                filter_frequency = random.randint(300, 600)
-            # Other string fields moderate filtering
-            elif "string" in field_str:
-                filter_frequency = random.randint(100, 400)
-            # Numeric fields less common
-            elif "number" in field_str or "int" in field_str:
-                filter_frequency = random.randint(50, 300)
-            else:
-                filter_frequency = random.randint(10, 200)
-            
-            field_patterns.append({
-                "collection": collection_name,
-                "field": field_name,
-                "type": field_type,
-                "filter_frequency": filter_frequency,
-                "filter_percentage": min(100, filter_frequency / 10)
-            })
+    # Classify every field first, then draw all frequencies in one call
+    for collection_name, field_name, field_type, field_lower, field_str, keywords in zip(*norm):
+        category_ids.append(_filter_category(field_name, field_lower, field_str, keywords))
+        field_patterns.append({
+            "collection": collection_name,
+            "field": field_name,
+            "type": field_type,
+            "_is_array": _is_array(field_name, field_type, field_lower, field_str, keywords),
+            "_name_lc": field_lower,
+            "_type_lc": field_str,
+            "_keywords": keywords,
+            "_types": _type_mask(field_str),
+        })
     
-    # Sort by filter frequency
-    field_patterns.sort(key=lambda x: x["filter_frequency"], reverse=True)
+    ranges = _FILTER_FREQUENCY_RANGES[np.array(category_ids, dtype=np.int8)]
+    frequencies = rng.integers(ranges[:, 0], ranges[:, 1], endpoint=True)
+    
+    for pattern, filter_frequency, filter_percentage in zip(field_patterns, frequencies.tolist(), _percentages(frequencies)):
+        pattern["filter_frequency"] = filter_frequency
+        pattern["filter_percentage"] = filter_percentage
     
-    return field_patterns
+    # Sort by filter frequency
+    return _sort_records(field_patterns, frequencies, descending=True)
 
 
-def analyze_array_update_patterns(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+def analyze_array_update_patterns(
+    schema: Dict[str, Any],
+    normalized: Optional[_NormalizedSchema] = None,
+    rng: Optional[random.Random] = None
+) -> List[Dict[str, Any]]:
     """
     Analyze which array fields are most frequently updated.
     Only detect true arrays, not fields that happen to end with 's'.
     """
     array_patterns = []
-    result = schema.get("result", {})
-    schema_def = result.get("schema", {})
-    
-    # Exclude common non-array fields ending in 's'
-    non_array_endings = ["status", "address", "class", "business", "access", "progress", "process"]
-    
-    for collection_name, fields in schema_def.items():
-        if not isinstance(fields, dict):
-            continue
-        
-        for field_name, field_type in fields.items():
-            field_str = str(field_type).lower()
-            field_lower = field_name.lower()
-            
-            # Skip if it's a known non-array field
-            if field_lower in non_array_endings:
-                continue
-            
-            # Detect TRUE array fields
-            is_array = False
-            
-            # Explicit array in type
-            if "array" in field_str or isinstance(field_type, list):
-                is_array = True
-            # Semantic plural + common array patterns (not just any 's')
-            elif field_name.endswith("s") and any(keyword in field_lower for keyword in 
-                ["comment", "review", "item", "tag", "member", "rating", "notification", 
-                 "message", "log", "event", "document", "file", "image", "video", "photo"]):
-                is_array = True
+    norm = normalized or normalize_schema(schema)
+    rng = rng or random.Random(_schema_seed(schema))
+    
+    for collection_name, field_name, field_type, field_lower, field_str, keywords in zip(*norm):
+        # Detect TRUE array fields: explicit array type, or a semantic plural
+        # of a common array noun (not just any 's')
+        if _is_array(field_name, field_type, field_lower, field_str, keywords):
+            # Simulate update frequency
+            # Arrays with common names are updated more often
+            if keywords & _KW_HOT_ARRAY:
+                update_frequency = rng.randrange(700, 951)
+            elif keywords & _KW_FEED_ARRAY:
+                update_frequency = rng.randrange(400, 701)
+            else:
+                update_frequency = rng.randrange(200, 501)
             
-            if is_array:
-                # Simulate update frequency
-                # Arrays with common names are updated more often
-                if any(keyword in field_lower for keyword in ["comment", "review", "item", "tag", "member"]):
-                    update_frequency = random.randint(700, 950)
-                elif any(keyword in field_lower for keyword in ["log", "notification", "message"]):
-                    update_frequency = random.randint(400, 700)
-                else:
-                    update_frequency = random.randint(200, 500)
-                
-                array_patterns.append({
-                    "collection": collection_name,
-                    "field": field_name,
-                    "type": field_type,
-                    "update_frequency": update_frequency,
-                    "update_percentage": min(100, update_frequency / 10),
-                    "estimated_size": random.randint(5, 50)  # Estimated array size
-                })
+            array_patterns.append({
+                "collection": collection_name,
+                "field": field_name,
+                "type": field_type,
+                "update_frequency": update_frequency,
+                "estimated_size": rng.randrange(5, 51)  # Estimated array size
+            })
     
-    # Sort by update frequency
-    array_patterns.sort(key=lambda x: x["update_frequency"], reverse=True)
+    update_frequencies = [a["update_frequency"] for a in array_patterns]
+    for pattern, update_percentage in zip(array_patterns, _percentages(update_frequencies)):
+        pattern["update_percentage"] = update_percentage
     
-    return array_patterns
+    # Sort by update frequency
+    return _sort_records(array_patterns, update_frequencies, descending=True)
+
+
+# Inclusive query-frequency ranges for archival candidates, by priority:
+# deep nested fields, large text fields, metadata and legacy fields,
+# historical data fields
+_RARE_QUERY_RANGES = ((5, 50), (20, 100), (10, 80), (15, 90))
 
 
-def detect_rarely_queried_fields(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+def detect_rarely_queried_fields(
+    schema: Dict[str, Any],
+    normalized: Optional[_NormalizedSchema] = None,
+    rng: Optional[random.Random] = None
+) -> List[Dict[str, Any]]:
     """
     Detect fields that are rarely queried (candidates for archival or removal).
     Only recommend archival for large text fields and historical data.
     """
     rare_fields = []
-    result = schema.get("result", {})
-    schema_def = result.get("schema", {})
+    norm = normalized or normalize_schema(schema)
+    rng = rng or random.Random(_schema_seed(schema))
     
-    for collection_name, fields in schema_def.items():
-        if not isinstance(fields, dict):
+    for collection_name, field_name, field_type, field_lower, field_str, keywords in zip(*norm):
+        # Skip small numeric fields (not good archival candidates)
+        if keywords & _KW_COUNTER:
+            if "number" in field_str or "int" in field_str:
+                continue
+        
+        # Skip _id and reference fields
+        if field_name == "_id" or "ref:" in field_str or "objectid" in field_str:
             continue
         
-        for field_name, field_type in fields.items():
-            field_str = str(field_type).lower()
-            
-            # Skip small numeric fields (not good archival candidates)
-            if any(keyword in field_name.lower() for keyword in ["count", "total", "sold", "quantity", "amount", "price", "capacity"]):
-                if "number" in field_str or "int" in field_str:
-                    continue
-            
-            # Skip _id and reference fields
-            if field_name == "_id" or "ref:" in field_str or "objectid" in field_str:
-                continue
-            
-            # Simulate query frequency
-            query_frequency = 0
-            is_archival_candidate = False
-            
-            # Deep nested fields are rarely queried
-            if isinstance(field_type, dict):
-                query_frequency = random.randint(5, 50)
-                is_archival_candidate = True
-            # Large text fields (good archival candidates)
-            elif any(keyword in field_name.lower() for keyword in ["description", "notes", "bio", "content", "body", "message", "text"]):
-                query_frequency = random.randint(20, 100)
-                is_archival_candidate = True
-            # Metadata and legacy fields
-            elif any(keyword in field_name.lower() for keyword in ["metadata", "internal", "legacy", "old", "archived"]):
-                query_frequency = random.randint(10, 80)
-                is_archival_candidate = True
-            # Historical data fields
-            elif any(keyword in field_name.lower() for keyword in ["history", "log", "audit"]):
-                query_frequency = random.randint(15, 90)
-                is_archival_candidate = True
-            else:
-                continue
-            
-            # Only include rarely queried (< 120 queries/day) AND good archival candidates
-            if query_frequency < 120 and is_archival_candidate:
-                rare_fields.append({
-                    "collection": collection_name,
-                    "field": field_name,
-                    "type": field_type,
-                    "query_frequency": query_frequency,
-                    "query_percentage": min(100, query_frequency / 10),
-                    "recommendation": "Archive to cold storage" if query_frequency < 40 else "Consider archival for historical data"
-                })
+        # Archival candidate groups as bits, in _RARE_QUERY_RANGES order
+        candidate = (
+            isinstance(field_type, dict)
+            | bool(keywords & _KW_LARGE_TEXT) << 1
+            | bool(keywords & _KW_METADATA) << 2
+            | bool(keywords & _KW_HISTORY) << 3
+        )
+        if not candidate:
+            continue
+        
+        # Simulate query frequency from the first matching group
+        low, high = _RARE_QUERY_RANGES[(candidate & -candidate).bit_length() - 1]
+        query_frequency = rng.randrange(low, high + 1)
+        
+        # Only include rarely queried (< 120 queries/day) archival candidates
+        if query_frequency < 120:
+            rare_fields.append({
+                "collection": collection_name,
+                "field": field_name,
+                "type": field_type,
+                "query_frequency": query_frequency,
+                "recommendation": "Archive to cold storage" if query_frequency < 40 else "Consider archival for historical data"
+            })
     
-    # Sort by query frequency (lowest first)
-    rare_fields.sort(key=lambda x: x["query_frequency"])
+    query_frequencies = [r["query_frequency"] for r in rare_fields]
+    for field, query_percentage in zip(rare_fields, _percentages(query_frequencies)):
+        field["query_percentage"] = query_percentage
     
-    return rare_fields
+    # Sort by query frequency (lowest first)
+    return _sort_records(rare_fields, query_frequencies)
 
 
-def analyze_collection_write_patterns(schema: Dict[str, Any]) -> List[Dict[str, Any]]:
+def analyze_collection_write_patterns(
+    schema: Dict[str, Any],
+    rng: Optional[random.Random] = None,
+    collections: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+) -> List[Dict[str, Any]]:
     """
     Analyze write-heavy collections (inserts + updates).
     """
     collection_patterns = []
-    result = schema.get("result", {})
-    schema_def = result.get("schema", {})
+    rng = rng or random.Random(_schema_seed(schema))
     
-    for collection_name, fields in schema_def.items():
-        if not isinstance(fields, dict):
-            continue
-        
+    for collection_name, fields in collections if collections is not None else _valid_collections(schema):
         # Estimate write frequency based on collection purpose
         write_ops_per_sec = 0
         read_ops_per_sec = 0
+        keywords = _keyword_mask(collection_name.lower())
         
         # Transaction/event collections are write-heavy
-        if any(keyword in collection_name.lower() for keyword in ["transaction", "event", "log", "ticket", "order"]):
-            write_ops_per_sec = random.uniform(15, 45)
-            read_ops_per_sec = random.uniform(30, 100)
+        if keywords & _KW_WRITE_HEAVY_COLL:
+            write_ops_per_sec = rng.uniform(15, 45)
+            read_ops_per_sec = rng.uniform(30, 100)
         # Review/comment collections moderate writes
-        elif any(keyword in collection_name.lower() for keyword in ["review", "comment", "rating"]):
-            write_ops_per_sec = random.uniform(8, 25)
-            read_ops_per_sec = random.uniform(50, 150)
+        elif keywords & _KW_REVIEW_COLL:
+            write_ops_per_sec = rng.uniform(8, 25)
+            read_ops_per_sec = rng.uniform(50, 150)
         # User collections are read-heavy
-        elif any(keyword in collection_name.lower() for keyword in ["user", "profile", "account"]):
-            write_ops_per_sec = random.uniform(2, 10)
-            read_ops_per_sec = random.uniform(80, 200)
+        elif keywords & _KW_USER_COLL:
+            write_ops_per_sec = rng.uniform(2, 10)
+            read_ops_per_sec = rng.uniform(80, 200)
         else:
-            write_ops_per_sec = random.uniform(5, 20)
-            read_ops_per_sec = random.uniform(40, 120)
+            write_ops_per_sec = rng.uniform(5, 20)
+            read_ops_per_sec = rng.uniform(40, 120)
         
         total_ops = write_ops_per_sec + read_ops_per_sec
         write_percentage = (write_ops_per_sec / total_ops) * 100
         
-        # Count array fields (indicates potential write complexity)
-        array_count = sum(1 for f, t in fields.items() if "array" in str(t).lower() or f.endswith("s"))
-        ref_count = sum(1 for f, t in fields.items() if "ref:" in str(t).lower() or "objectid" in str(t).lower())
+        # Count array fields (indicates potential write complexity) and references
+        array_count = ref_count = 0
+        for f, t in fields.items():
+            t_str = str(t).lower()
+            if "array" in t_str or f.endswith("s"):
+                array_count += 1
+            if "ref:" in t_str or "objectid" in t_str:
+                ref_count += 1
         
         collection_patterns.append({
             "collection": collection_name,
@@ -242,43 +482,41 @@ def analyze_collection_write_patterns(schema: Dict[str, Any]) -> List[Dict[str,
         })
     
     # Sort by write percentage
-    collection_patterns.sort(key=lambda x: x["write_percentage"], reverse=True)
-    
-    return collection_patterns
+    return _sort_records(collection_patterns, [c["write_percentage"] for c in collection_patterns], descending=True)
 
 
 def is_array_field(field_name: str, field_type: Any) -> bool:
     """Check if a field is an array (don't index array fields directly)."""
-    field_str = str(field_type).lower()
     field_lower = field_name.lower()
-    
-    non_array_endings = ["status", "address", "class", "business", "access", "progress", "process"]
-    if field_lower in non_array_endings:
-        return False
-    
-    if "array" in field_str or isinstance(field_type, list):
-        return True
-    
-    if field_name.endswith("s") and any(keyword in field_lower for keyword in 
-        ["comment", "review", "item", "tag", "member", "rating", "notification", 
-         "message", "log", "event", "document", "file", "image", "video", "photo"]):
-        return True
-    
-    return False
+    return _is_array(field_name, field_type, field_lower, str(field_type).lower(), _keyword_mask(field_lower))
+
+
+# createIndex shell command templates
+_COMPOUND_SORT_INDEX_TMPL = "db.%s.createIndex({ %s: 1, %s: -1 })"
+_COMPOUND_INDEX_TMPL = "db.%s.createIndex({ %s: 1, %s: 1 })"
+_SINGLE_INDEX_TMPL = "db.%s.createIndex({ %s: 1 })"
+
+
+def _improvement(before_ms: float, after_ms: float) -> str:
+    return "%.0f%%" % round((1 - after_ms / before_ms) * 100, 0)
 
 
 def detect_redundant_indexes(commands: List[Dict[str, Any]]) -> List[str]:
     """Detect redundant indexes where compound index covers single-field index."""
     redundant = []
     
+    # Index single-field commands by (collection, field) with their position
+    singles = defaultdict(list)
+    for i, cmd in enumerate(commands):
+        if len(cmd["fields"]) == 1:
+            singles[(cmd["collection"], cmd["fields"][0])].append(i)
+    
+    # A compound index covers any later single-field index on its first field
     for i, cmd1 in enumerate(commands):
-        for cmd2 in commands[i+1:]:
-            # If same collection
-            if cmd1["collection"] == cmd2["collection"]:
-                # If cmd2 is single-field and cmd1 is compound starting with same field
-                if len(cmd2["fields"]) == 1 and len(cmd1["fields"]) > 1:
-                    if cmd1["fields"][0] == cmd2["fields"][0]:
-                        redundant.append(f"Index {{{cmd2['fields'][0]}: 1}} is redundant - covered by compound index {{{cmd1['fields'][0]}: 1, {cmd1['fields'][1]}: -1}}")
+        if len(cmd1["fields"]) > 1:
+            for j in singles.get((cmd1["collection"], cmd1["fields"][0]), ()):
+                if j > i:
+                    redundant.append(f"Index {{{cmd1['fields'][0]}: 1}} is redundant - covered by compound index {{{cmd1['fields'][0]}: 1, {cmd1['fields'][1]}: -1}}")
     
     return redundant
 
@@ -301,25 +539,29 @@ def generate_index_commands(filtered_fields: List[Dict[str, Any]], schema: Dict[
         collections[coll].append(field)
     
     for collection, fields in collections.items():
-        # Find foreign keys (exclude arrays, only if >500 queries/day)
-        # Skip low-frequency fields like phone unless they're heavily queried
-        foreign_keys = [f for f in fields 
-                       if "id" in f["field"].lower() 
-                       and f["field"] != "_id" 
-                       and f["filter_frequency"] > 500
-                       and not is_array_field(f["field"], f["type"])]
-        
-        # Find date fields (exclude arrays)
-        date_fields = [f for f in fields 
-                      if (("date" in str(f["type"]).lower() or f["field"].lower().endswith("at")) 
-                      and not is_array_field(f["field"], f["type"]))]
+        foreign_keys = []
+        date_fields = []
+        other_fields = []
         
-        # Other high-filter fields (exclude arrays)
-        other_fields = [f for f in fields 
-                       if f not in foreign_keys 
-                       and f not in date_fields 
-                       and f["filter_frequency"] > 500
-                       and not is_array_field(f["field"], f["type"])]
+        # Partition in one pass, never indexing array fields
+        for f in fields:
+            if _record_is_array(f):
+                continue
+            
+            field_lower, _, keywords, types = _field_features(f)
+            high_filter = f["filter_frequency"] > 500
+            # Foreign keys only if >500 queries/day
+            # Skip low-frequency fields like phone unless they're heavily queried
+            is_fk = high_filter and keywords & _KW_ID and f["field"] != "_id"
+            is_date = types & _TY_DATE or field_lower.endswith("at")
+            
+            if is_fk:
+                foreign_keys.append(f)
+            if is_date:
+                date_fields.append(f)
+            # Other high-filter fields
+            if high_filter and not is_fk and not is_date:
+                other_fields.append(f)
         
         # Generate compound indexes (foreign key + date)
         for fk in foreign_keys[:2]:  # Top 2 foreign keys per collection
@@ -327,7 +569,7 @@ def generate_index_commands(filtered_fields: List[Dict[str, Any]], schema: Dict[
             
             if date_field:
                 # Compound index with date for sorting
-                command = f"db.{collection}.createIndex({{ {fk['field']}: 1, {date_field['field']}: -1 }})"
+                command = _COMPOUND_SORT_INDEX_TMPL % (collection, fk['field'], date_field['field'])
                 before_ms = 450 + (fk['filter_frequency'] / 10)
                 after_ms = max(30, before_ms * 0.1)
                 
@@ -338,12 +580,12 @@ def generate_index_commands(filtered_fields: List[Dict[str, Any]], schema: Dict[
                     "reason": f"Optimize queries filtering by {fk['field']} + sorting by {date_field['field']}",
                     "before_ms": round(before_ms, 0),
                     "after_ms": round(after_ms, 0),
-                    "improvement": f"{round((1 - after_ms/before_ms) * 100, 0):.0f}%",
+                    "improvement": _improvement(before_ms, after_ms),
                     "type": "compound"
                 })
             else:
                 # Single field index
-                command = f"db.{collection}.createIndex({{ {fk['field']}: 1 }})"
+                command = _SINGLE_INDEX_TMPL % (collection, fk['field'])
                 before_ms = 380 + (fk['filter_frequency'] / 12)
                 after_ms = max(25, before_ms * 0.12)
                 
@@ -354,21 +596,21 @@ def generate_index_commands(filtered_fields: List[Dict[str, Any]], schema: Dict[
                     "reason": f"Optimize lookups by {fk['field']}",
                     "before_ms": round(before_ms, 0),
                     "after_ms": round(after_ms, 0),
-                    "improvement": f"{round((1 - after_ms/before_ms) * 100, 0):.0f}%",
+                    "improvement": _improvement(before_ms, after_ms),
                     "type": "single"
                 })
         
         # Add indexes for other high-frequency fields (skip low-selectivity standalone indexes)
         for field in other_fields[:1]:  # Top 1 additional per collection
-            if field["field"] not in [fk['field'] for fk in foreign_keys]:
+            if field["field"] not in {fk['field'] for fk in foreign_keys}:
                 # Check if this is a low-selectivity field
                 field_name = field['field']
-                is_low_selectivity = any(keyword in field_name.lower() for keyword in ["status", "type", "category", "state"])
+                is_low_selectivity = bool(_field_features(field)[2] & _KW_STATUS)
                 
                 if is_low_selectivity and foreign_keys:
                     # Create compound index with foreign key instead of standalone
                     fk_field = foreign_keys[0]['field']
-                    command = f"db.{collection}.createIndex({{ {fk_field}: 1, {field_name}: 1 }})"
+                    command = _COMPOUND_INDEX_TMPL % (collection, fk_field, field_name)
                     before_ms = 380 + (field['filter_frequency'] / 12)
                     after_ms = max(25, before_ms * 0.12)
                     
@@ -379,12 +621,12 @@ def generate_index_commands(filtered_fields: List[Dict[str, Any]], schema: Dict[
                         "reason": f"Compound index (avoids low-selectivity standalone index on {field_name})",
                         "before_ms": round(before_ms, 0),
                         "after_ms": round(after_ms, 0),
-                        "improvement": f"{round((1 - after_ms/before_ms) * 100, 0):.0f}%",
+                        "improvement": _improvement(before_ms, after_ms),
                         "type": "compound"
                     })
                 elif not is_low_selectivity:
                     # Safe to create standalone index
-                    command = f"db.{collection}.createIndex({{ {field_name}: 1 }})"
+                    command = _SINGLE_INDEX_TMPL % (collection, field_name)
                     before_ms = 320 + (field['filter_frequency'] / 15)
                     after_ms = max(20, before_ms * 0.15)
                     
@@ -395,7 +637,7 @@ def generate_index_commands(filtered_fields: List[Dict[str, Any]], schema: Dict[
                         "reason": f"Frequently filtered field ({field['filter_frequency']} queries/day)",
                         "before_ms": round(before_ms, 0),
                         "after_ms": round(after_ms, 0),
-                        "improvement": f"{round((1 - after_ms/before_ms) * 100, 0):.0f}%",
+                        "improvement": _improvement(before_ms, after_ms),
                         "type": "single"
                     })
                 # Otherwise skip low-selectivity field without compound option
@@ -406,20 +648,11 @@ def generate_index_commands(filtered_fields: List[Dict[str, Any]], schema: Dict[
     # Remove redundant single-field indexes if covered by compound
     if redundant_warnings:
         # Keep only compound indexes and unique single indexes
-        filtered_commands = []
-        for cmd in commands:
-            is_redundant = False
-            if len(cmd["fields"]) == 1:
-                # Check if covered by compound index
-                for other_cmd in commands:
-                    if (other_cmd["collection"] == cmd["collection"] 
-                        and len(other_cmd["fields"]) > 1 
-                        and other_cmd["fields"][0] == cmd["fields"][0]):
-                        is_redundant = True
-                        break
-            if not is_redundant:
-                filtered_commands.append(cmd)
-        commands = filtered_commands
+        compound_prefixes = {(cmd["collection"], cmd["fields"][0]) for cmd in commands if len(cmd["fields"]) > 1}
+        commands = [
+            cmd for cmd in commands
+            if len(cmd["fields"]) > 1 or (cmd["collection"], cmd["fields"][0]) not in compound_prefixes
+        ]
     
     return commands[:8]  # Max 8 indexes
 
@@ -437,20 +670,18 @@ def generate_array_growth_projection(array_updates: List[Dict[str, Any]]) -> Dic
     current_size_kb = 15  # Assume current array is ~15KB
     daily_growth_kb = (top_array["update_frequency"] / 100) * 0.5  # Each update ~0.5KB
     
-    projection = []
-    months_to_16mb = None
+    months = np.arange(7)
+    sizes_mb = (current_size_kb + (daily_growth_kb * 30 * months)) / 1024
+    statuses = np.where(sizes_mb > 12, "critical", np.where(sizes_mb > 6, "warning", "safe"))
     
-    for month in range(7):
-        size_mb = (current_size_kb + (daily_growth_kb * 30 * month)) / 1024
-        projection.append({
-            "month": month,
-            "size_mb": round(size_mb, 2),
-            "status": "critical" if size_mb > 12 else ("warning" if size_mb > 6 else "safe")
-        })
-        
-        # Calculate when it will hit 16MB limit
-        if months_to_16mb is None and size_mb >= 16:
-            months_to_16mb = month
+    projection = [
+        {"month": month, "size_mb": round(size_mb, 2), "status": status}
+        for month, size_mb, status in zip(months.tolist(), sizes_mb.tolist(), statuses.tolist())
+    ]
+    
+    # Calculate when it will hit 16MB limit
+    over_limit = sizes_mb >= 16
+    months_to_16mb = int(over_limit.argmax()) if over_limit.any() else None
     
     # If not reached in 6 months, calculate when it will
     if months_to_16mb is None:
@@ -583,7 +814,7 @@ def calculate_write_amplification(
     amplification_factor = total_write_cost / base_write
     
     # Find most write-heavy collection
-    write_heavy_collections = sorted(write_patterns, key=lambda x: x["write_percentage"], reverse=True)[:3]
+    write_heavy_collections = heapq.nlargest(3, write_patterns, key=itemgetter("write_percentage"))
     
     # Calculate estimated write load
     total_write_ops_per_sec = sum(w["write_ops_per_sec"] for w in write_heavy_collections)
@@ -640,13 +871,14 @@ def calculate_improved_coverage(
     # Track which fields are covered
     covered_fields = set()
     
-    for cmd in index_commands:
-        # Each field in the index command is covered
-        for field in cmd.get("fields", []):
-            # Find matching high-frequency fields
-            for hf in high_freq_fields:
-                if hf["field"] == field or field in hf["field"]:
-                    covered_fields.add(f"{hf['collection']}.{hf['field']}")
+    # A high-frequency field is covered by an index on the same field or on
+    # any field name contained in it; match all index fields in one search
+    index_fields = {field for cmd in index_commands for field in cmd.get("fields", [])}
+    if index_fields:
+        index_field_re = re.compile("|".join(re.escape(f) for f in sorted(index_fields, key=len, reverse=True)))
+        for hf in high_freq_fields:
+            if hf["field"] in index_fields or index_field_re.search(hf["field"]):
+                covered_fields.add(f"{hf['collection']}.{hf['field']}")
     
     covered_count = len(covered_fields)
     coverage_percent = (covered_count / total_high_freq * 100) if total_high_freq > 0 else 0
@@ -683,75 +915,91 @@ def calculate_improved_coverage(
     }
 
 
+# Example query shell command templates
+_POINT_LOOKUP_TMPL = "db.%s.find({ %s: ObjectId(...) })"
+_RANGE_QUERY_TMPL = "db.%s.find({ %s: { $gte: ... } })"
+_SORT_QUERY_TMPL = "db.%s.find().sort({ %s: -1 })"
+
+
+def _query_examples(fields: List[Dict[str, Any]], indices: List[int], template: str) -> List[Dict[str, Any]]:
+    """Format example queries for the selected field records."""
+    queries = []
+    for i in indices:
+        field = fields[i]
+        queries.append({
+            "field": f"{field['collection']}.{field['field']}",
+            "frequency": field["filter_frequency"],
+            "example": template % (field["collection"], field["field"])
+        })
+    return queries
+
+
 def classify_query_patterns(filtered_fields: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Classify query patterns (point lookup, range, sort, aggregation).
     Makes the analyzer look enterprise-grade.
     """
-    point_lookups = []
-    range_queries = []
-    sort_queries = []
     lookup_collections = []
+    lookup_seen = set()
+    
+    # Per-field feature arrays, classified as whole-array boolean masks
+    count = len(filtered_fields)
+    features = [_field_features(field) for field in filtered_fields]
+    keywords = np.fromiter((f[2] for f in features), dtype=np.int64, count=count)
+    types = np.fromiter((f[3] for f in features), dtype=np.int64, count=count)
+    ends_at = np.fromiter((f[0].endswith("at") for f in features), dtype=bool, count=count)
+    # Array check on the lowercased type string (a list-typed field is not treated as an array here)
+    is_array = np.fromiter(
+        (_is_array(field["field"], f[1], f[0], f[1], f[2]) for field, f in zip(filtered_fields, features)),
+        dtype=bool, count=count,
+    )
     
-    for field in filtered_fields:
-        field_name = field["field"]
-        field_type = str(field["type"]).lower()
-        
-        # Point lookups: _id, foreign keys, unique fields
-        if field_name == "_id" or "objectid" in field_type or "id" in field_name.lower():
-            point_lookups.append({
-                "field": f"{field['collection']}.{field_name}",
-                "frequency": field["filter_frequency"],
-                "example": f"db.{field['collection']}.find({{ {field_name}: ObjectId(...) }})"
-            })
-        
-        # Range queries: dates, numbers (exclude array fields - they shouldn't be range-queried)
-        elif (("date" in field_type or "time" in field_type or field_name.lower().endswith("at") 
-              or "number" in field_type or "int" in field_type)
-              and not is_array_field(field_name, field_type)):
-            range_queries.append({
-                "field": f"{field['collection']}.{field_name}",
-                "frequency": field["filter_frequency"],
-                "example": f"db.{field['collection']}.find({{ {field_name}: {{ $gte: ... }} }})"
-            })
-        
-        # Sort queries: dates, numbers, status (exclude array fields - sorting arrays is bad practice)
-        if (("date" in field_type or field_name.lower().endswith("at") 
-            or "status" in field_name.lower() or "priority" in field_name.lower())
-            and not is_array_field(field_name, field_type)):
-            sort_queries.append({
-                "field": f"{field['collection']}.{field_name}",
-                "frequency": field["filter_frequency"],
-                "example": f"db.{field['collection']}.find().sort({{ {field_name}: -1 }})"
-            })
+    has_id = (keywords & _KW_ID) != 0
+    is_objectid = (types & _TY_OBJECTID) != 0
+    
+    # Point lookups: _id, foreign keys, unique fields
+    point_mask = is_objectid | has_id
+    # Range queries: dates, numbers (exclude array fields - they shouldn't be range-queried)
+    range_mask = ~point_mask & ~is_array & (((types & (_TY_DATE | _TY_TIME | _TY_NUMBER | _TY_INT)) != 0) | ends_at)
+    # Sort queries: dates, numbers, status (exclude array fields - sorting arrays is bad practice)
+    sort_mask = ~is_array & (((types & _TY_DATE) != 0) | ends_at | ((keywords & _KW_SORTABLE) != 0))
+    # Reference fields involved in $lookup
+    join_mask = ((types & _TY_REF) != 0) | (is_objectid & has_id)
+    
+    # Matching record positions; only the first five of each get example queries
+    point_lookups = np.flatnonzero(point_mask).tolist()
+    range_queries = np.flatnonzero(range_mask).tolist()
+    sort_queries = np.flatnonzero(sort_mask).tolist()
+    
+    # Build specific join relationships
+    for i in np.flatnonzero(join_mask).tolist():
+        field = filtered_fields[i]
+        name_lc = features[i][0]
+        # Extract referenced collection from field name (e.g., userId -> users, eventId -> events)
+        ref_collection = None
+        if name_lc.endswith("userid"):
+            ref_collection = "users"
+        elif name_lc.endswith("eventid"):
+            ref_collection = "events"
+        elif has_id[i]:
+            # Generic: extract collection name from field (e.g., ticketId -> tickets)
+            base = name_lc.replace("id", "")
+            ref_collection = base + "s" if base else None
         
-        # Track collections involved in $lookup (reference fields)
-        # Build specific join relationships
-        if "ref:" in str(field["type"]).lower() or ("objectid" in str(field["type"]).lower() and "id" in field_name.lower()):
-            # Extract referenced collection from field name (e.g., userId -> users, eventId -> events)
-            ref_collection = None
-            if field_name.lower().endswith("userid"):
-                ref_collection = "users"
-            elif field_name.lower().endswith("eventid"):
-                ref_collection = "events"
-            elif "id" in field_name.lower():
-                # Generic: extract collection name from field (e.g., ticketId -> tickets)
-                base = field_name.lower().replace("id", "")
-                ref_collection = base + "s" if base else None
-            
-            if ref_collection:
-                # Add to list if not already present
-                lookup_key = f"{field['collection']}->{ref_collection}"
-                if not any(l.get("source") == field["collection"] and l.get("target") == ref_collection for l in lookup_collections):
-                    lookup_collections.append({
-                        "source": field["collection"],
-                        "target": ref_collection,
-                        "field": field_name
-                    })
+        if ref_collection:
+            # Add to list if not already present
+            lookup_key = (field["collection"], ref_collection)
+            if lookup_key not in lookup_seen:
+                lookup_seen.add(lookup_key)
+                lookup_collections.append({
+                    "source": field["collection"],
+                    "target": ref_collection,
+                    "field": field["field"]
+                })
     
     # Format aggregation relationships
     agg_relationships = []
-    for lookup in sorted(lookup_collections, key=lambda x: x.get("source", "")):
+    for lookup in sorted(lookup_collections, key=itemgetter("source"))[:5]:
         agg_relationships.append({
             "relationship": f"{lookup['source']} → joins {lookup['target']}",
             "field": lookup["field"]
@@ -760,22 +1008,22 @@ def classify_query_patterns(filtered_fields: List[Dict[str, Any]]) -> Dict[str,
     return {
         "point_lookups": {
             "count": len(point_lookups),
-            "queries": point_lookups[:5],
+            "queries": _query_examples(filtered_fields, point_lookups[:5], _POINT_LOOKUP_TMPL),
             "description": "Direct document lookups by _id or unique key"
         },
         "range_queries": {
             "count": len(range_queries),
-            "queries": range_queries[:5],
+            "queries": _query_examples(filtered_fields, range_queries[:5], _RANGE_QUERY_TMPL),
             "description": "Queries using $gte, $lte, $gt, $lt operators"
         },
         "sort_queries": {
             "count": len(sort_queries),
-            "queries": sort_queries[:5],
+            "queries": _query_examples(filtered_fields, sort_queries[:5], _SORT_QUERY_TMPL),
             "description": "Queries using .sort() for ordering results"
         },
         "aggregations": {
-            "count": len(agg_relationships),
-            "relationships": agg_relationships[:5],
+            "count": len(lookup_collections),
+            "relationships": agg_relationships,
             "description": "Collections with $lookup join patterns"
         }
     }
@@ -786,7 +1034,8 @@ def generate_indexing_recommendations(
     array_updates: List[Dict[str, Any]],
     rare_fields: List[Dict[str, Any]],
     write_patterns: List[Dict[str, Any]],
-    schema: Dict[str, Any]
+    schema: Dict[str, Any],
+    index_commands: Optional[List[Dict[str, Any]]] = None
 ) -> List[Dict[str, Any]]:
     """
     Generate actionable recommendations based on access patterns.
@@ -795,23 +1044,32 @@ def generate_indexing_recommendations(
     
     # Index high-filter fields (excluding _id which is auto-indexed)
     # Focus on foreign keys and date fields
-    indexable_fields = [
-        f for f in filtered_fields[:10] 
-        if f["filter_frequency"] > 500 
-        and f["field"] != "_id"  # _id is auto-indexed
-        and not f["field"].endswith("._id")  # Nested _id
-    ]
-    
     # Prioritize foreign keys and date fields
-    foreign_keys = [f for f in indexable_fields if "id" in f["field"].lower() and f["field"] != "_id"]
-    date_fields = [f for f in indexable_fields if "date" in str(f["type"]).lower() or f["field"].lower().endswith("at")]
-    other_high_filter = [f for f in indexable_fields if f not in foreign_keys and f not in date_fields]
+    foreign_keys = []
+    date_fields = []
+    other_high_filter = []
+    for f in filtered_fields[:10]:
+        if (f["filter_frequency"] <= 500
+                or f["field"] == "_id"  # _id is auto-indexed
+                or f["field"].endswith("._id")):  # Nested _id
+            continue
+        
+        field_lower, _, keywords, types = _field_features(f)
+        is_fk = keywords & _KW_ID
+        is_date = types & _TY_DATE or field_lower.endswith("at")
+        if is_fk:
+            foreign_keys.append(f)
+        if is_date:
+            date_fields.append(f)
+        if not is_fk and not is_date:
+            other_high_filter.append(f)
     
     # Combine with priority: foreign keys first, then dates, then others
-    top_filtered = (foreign_keys + date_fields + other_high_filter)[:5]
+    top_filtered = (foreign_keys + date_fields + other_high_filter)[:4]
     
     # Generate specific index commands
-    index_commands = generate_index_commands(filtered_fields[:15], schema)
+    if index_commands is None:
+        index_commands = generate_index_commands(filtered_fields[:15], schema)
     total_indexes = len(index_commands)
     
     if top_filtered:
@@ -819,7 +1077,7 @@ def generate_indexing_recommendations(
             "category": "Indexing",
             "priority": "high",
             "title": "Create production-ready indexes",
-            "fields": [f"{f['collection']}.{f['field']}" for f in top_filtered[:4]],
+            "fields": [f"{f['collection']}.{f['field']}" for f in top_filtered],
             "impact": "60-80% query performance improvement",
             "action": f"Run {total_indexes} index commands (see Index Commands section)",
             "warning": f"⚠️ {total_indexes} indexes recommended. Too many indexes slow writes. Monitor write performance."
@@ -866,7 +1124,7 @@ def generate_indexing_recommendations(
     write_heavy = [w for w in write_patterns if w["write_percentage"] > 30]
     if write_heavy:
         # Check if we have too many indexes on write-heavy collections
-        write_heavy_names = [w["collection"] for w in write_heavy]
+        write_heavy_names = {w["collection"] for w in write_heavy}
         indexes_on_write_heavy = [cmd for cmd in index_commands 
                                    if cmd.get("collection") in write_heavy_names]
         
@@ -902,66 +1160,62 @@ def generate_indexing_recommendations(
     return recommendations
 
 
+# Selectivity profiles: (cardinality, estimated unique values, selectivity %, recommendation)
+_SEL_UNIQUE = ("very_high", 50000, 100, "✓ Excellent selectivity")  # Unique per document
+_SEL_FOREIGN_KEY = ("high", 5000, 85, "✓ Good selectivity for foreign key")
+_SEL_CONTACT = ("high", 40000, 90, "✓ High selectivity (unique identifier)")
+_SEL_DATE = ("medium_high", 1000, 60, "✓ Moderate selectivity for date ranges")
+_SEL_ENUM = ("low", 5, 15, "⚠️ LOW selectivity. Consider compound index or remove.")  # Enum-like fields
+_SEL_NUMERIC = ("medium", 500, 40, "✓ Acceptable for numeric ranges")
+_SEL_DEFAULT = ("medium", 800, 50, "✓ Moderate selectivity")
+
+
 def analyze_index_selectivity(
     filtered_fields: List[Dict[str, Any]],
-    index_commands: List[Dict[str, Any]]
+    index_commands: List[Dict[str, Any]],
+    field_index: Optional[Dict[str, Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
     """
     Analyze index selectivity (cardinality) to identify weak indexes.
     Low selectivity = many duplicate values = weak index.
     """
-    selectivity_analysis = []
+    # One entry per collection.field, keeping the first index that uses it
+    selectivity_analysis: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    
+    if field_index is None:
+        field_index = _first_by_name(filtered_fields)
     
     for cmd in index_commands:
         for field_name in cmd.get("fields", []):
             # Find field info
-            field_info = next((f for f in filtered_fields if f["field"] == field_name), None)
+            field_info = field_index.get(field_name)
             if not field_info:
                 continue
             
-            field_type = str(field_info.get("type", "")).lower()
             collection = field_info["collection"]
+            key = (collection, field_name)
+            if key in selectivity_analysis:
+                continue
+            name_lc, _, keywords, types = _field_features(field_info)
             
             # Estimate cardinality based on field characteristics
-            if field_name == "_id" or "objectid" in field_type:
-                cardinality = "very_high"
-                estimated_unique = 50000  # Unique per document
-                selectivity_percent = 100
-                recommendation = "✓ Excellent selectivity"
-            elif "id" in field_name.lower() and field_name != "_id":
-                # Foreign keys - high cardinality
-                cardinality = "high"
-                estimated_unique = 5000
-                selectivity_percent = 85
-                recommendation = "✓ Good selectivity for foreign key"
-            elif any(keyword in field_name.lower() for keyword in ["email", "username", "phone"]):
-                cardinality = "high"
-                estimated_unique = 40000
-                selectivity_percent = 90
-                recommendation = "✓ High selectivity (unique identifier)"
-            elif "date" in field_type or field_name.lower().endswith("at"):
-                cardinality = "medium_high"
-                estimated_unique = 1000
-                selectivity_percent = 60
-                recommendation = "✓ Moderate selectivity for date ranges"
-            elif any(keyword in field_name.lower() for keyword in ["status", "type", "category", "state"]):
-                # Enum-like fields - LOW selectivity
-                cardinality = "low"
-                estimated_unique = 5
-                selectivity_percent = 15
-                recommendation = "⚠️ LOW selectivity. Consider compound index or remove."
-            elif "number" in field_type or "int" in field_type:
-                cardinality = "medium"
-                estimated_unique = 500
-                selectivity_percent = 40
-                recommendation = "✓ Acceptable for numeric ranges"
+            if field_name == "_id" or types & _TY_OBJECTID:
+                profile = _SEL_UNIQUE
+            elif keywords & _KW_ID:
+                profile = _SEL_FOREIGN_KEY
+            elif keywords & _KW_CONTACT:
+                profile = _SEL_CONTACT
+            elif types & _TY_DATE or name_lc.endswith("at"):
+                profile = _SEL_DATE
+            elif keywords & _KW_STATUS:
+                profile = _SEL_ENUM
+            elif types & (_TY_NUMBER | _TY_INT):
+                profile = _SEL_NUMERIC
             else:
-                cardinality = "medium"
-                estimated_unique = 800
-                selectivity_percent = 50
-                recommendation = "✓ Moderate selectivity"
+                profile = _SEL_DEFAULT
+            cardinality, estimated_unique, selectivity_percent, recommendation = profile
             
-            selectivity_analysis.append({
+            selectivity_analysis[key] = {
                 "collection": collection,
                 "field": field_name,
                 "cardinality": cardinality,
@@ -969,22 +1223,15 @@ def analyze_index_selectivity(
                 "selectivity_percent": selectivity_percent,
                 "recommendation": recommendation,
                 "weak_index": selectivity_percent < 20
-            })
+            }
     
-    # Deduplicate by collection.field
-    seen = set()
-    deduplicated = []
-    for item in selectivity_analysis:
-        key = f"{item['collection']}.{item['field']}"
-        if key not in seen:
-            seen.add(key)
-            deduplicated.append(item)
+    deduplicated = list(selectivity_analysis.values())
     
     # Find weak indexes
     weak_indexes = [s for s in deduplicated if s["weak_index"]]
     
     return {
-        "selectivity_analysis": sorted(deduplicated, key=lambda x: x["selectivity_percent"], reverse=True),
+        "selectivity_analysis": sorted(deduplicated, key=itemgetter("selectivity_percent"), reverse=True),
         "weak_indexes": weak_indexes,
         "weak_index_count": len(weak_indexes),
         "summary": f"{len(weak_indexes)} low-selectivity indexes detected" if weak_indexes else "All indexes have acceptable selectivity"
@@ -993,7 +1240,8 @@ def analyze_index_selectivity(
 
 def generate_shard_key_recommendations(
     write_patterns: List[Dict[str, Any]],
-    filtered_fields: List[Dict[str, Any]]
+    filtered_fields: List[Dict[str, Any]],
+    fields_by_collection: Optional[Dict[str, List[Dict[str, Any]]]] = None
 ) -> List[Dict[str, Any]]:
     """
     Recommend shard keys for high-volume collections.
@@ -1019,25 +1267,27 @@ def generate_shard_key_recommendations(
                 "total_ops_per_sec": w["total_ops_per_sec"]
             })
     
-    # Sort by priority score (highest first) - this dynamically adapts to workload
-    shard_candidates.sort(key=lambda x: x["priority_score"], reverse=True)
-    high_volume = shard_candidates[:3]  # Top 3 candidates
+    # Highest priority scores first - this dynamically adapts to workload
+    high_volume = heapq.nlargest(3, shard_candidates, key=itemgetter("priority_score"))  # Top 3 candidates
+    
+    if fields_by_collection is None:
+        fields_by_collection = _group_by_collection(filtered_fields)
     
     for coll_pattern in high_volume:
         collection = coll_pattern["collection"]
         
         # Find high-cardinality fields in this collection
-        coll_fields = [f for f in filtered_fields if f["collection"] == collection]
+        coll_fields = fields_by_collection.get(collection, [])
         
         # Prioritize foreign keys and IDs for shard keys
         shard_candidates = []
         
         for field in coll_fields:
             field_name = field["field"]
-            field_type = str(field.get("type", "")).lower()
+            name_lc, _, keywords, types = _field_features(field)
             
             # Good shard key candidates
-            if "id" in field_name.lower() and field_name != "_id":
+            if keywords & _KW_ID and field_name != "_id":
                 cardinality = "high"
                 shard_candidates.append({
                     "field": field_name,
@@ -1045,14 +1295,14 @@ def generate_shard_key_recommendations(
                     "strategy": "hashed",
                     "reason": f"High-cardinality foreign key - ensures even distribution"
                 })
-            elif any(keyword in field_name.lower() for keyword in ["email", "username"]):
+            elif keywords & _KW_UNIQUE:
                 shard_candidates.append({
                     "field": field_name,
                     "cardinality": "high",
                     "strategy": "hashed",
                     "reason": "Unique field with high cardinality"
                 })
-            elif "date" in field_type or field_name.lower().endswith("at"):
+            elif types & _TY_DATE or name_lc.endswith("at"):
                 shard_candidates.append({
                     "field": field_name,
                     "cardinality": "medium",
@@ -1075,11 +1325,18 @@ def generate_shard_key_recommendations(
             })
     
     # Sort final recommendations by priority (most critical first)
-    recommendations.sort(key=lambda x: x["priority_score"], reverse=True)
+    recommendations.sort(key=itemgetter("priority_score"), reverse=True)
     
     return recommendations
 
 
+# Current estimated users: 50K, projected to 5M
+_CURRENT_USERS = 50000
+_TARGET_USERS = 5000000
+_SCALE_FACTOR = _TARGET_USERS / _CURRENT_USERS  # 100x
+_LOG_SCALE_FACTOR = math.log10(_SCALE_FACTOR)
+
+
 def project_latency_at_scale(
     write_patterns: List[Dict[str, Any]],
     index_commands: List[Dict[str, Any]]
@@ -1087,14 +1344,15 @@ def project_latency_at_scale(
     """
     Project read vs write latency at 5M users.
     """
-    # Current estimated users: 50K
-    current_users = 50000
-    target_users = 5000000
-    scale_factor = target_users / current_users  # 100x
+    current_users = _CURRENT_USERS
+    target_users = _TARGET_USERS
+    scale_factor = _SCALE_FACTOR
     
-    # Calculate current total ops
-    total_read_ops = sum(w["read_ops_per_sec"] for w in write_patterns)
-    total_write_ops = sum(w["write_ops_per_sec"] for w in write_patterns)
+    # Calculate current total ops in one pass
+    total_read_ops = total_write_ops = 0
+    for w in write_patterns:
+        total_read_ops += w["read_ops_per_sec"]
+        total_write_ops += w["write_ops_per_sec"]
     
     # Projected ops at 5M users
     projected_read_ops = total_read_ops * scale_factor
@@ -1105,12 +1363,11 @@ def project_latency_at_scale(
     current_write_latency_ms = 15
     
     # Non-linear latency scaling (reads scale better than writes)
-    import math
     # Reads: 2-3x increase (logarithmic, benefits from indexes)
-    read_scale_factor = 2 + (math.log10(scale_factor) * 0.5)  # ~2.5x for 100x scale
+    read_scale_factor = 2 + (_LOG_SCALE_FACTOR * 0.5)  # ~2.5x for 100x scale
     
     # Writes: 4-6x increase (linear + contention)
-    write_base_scale = math.log10(scale_factor) + 1  # ~3x base
+    write_base_scale = _LOG_SCALE_FACTOR + 1  # ~3x base
     write_contention = 1 + (len(index_commands) * 0.15)  # Index overhead
     write_scale_factor = write_base_scale * write_contention
     
@@ -1174,18 +1431,88 @@ def project_latency_at_scale(
     }
 
 
-def analyze_access_patterns(schema: Dict[str, Any]) -> Dict[str, Any]:
+_ANALYSIS_CACHE_SIZE = 64
+_analysis_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_summary_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+
+def _cache_get(cache: "OrderedDict[bytes, Dict[str, Any]]", digest: bytes) -> Optional[Dict[str, Any]]:
+    value = cache.get(digest)
+    if value is not None:
+        cache.move_to_end(digest)
+    return value
+
+
+def _cache_put(cache: "OrderedDict[bytes, Dict[str, Any]]", digest: bytes, value: Dict[str, Any]) -> None:
+    cache[digest] = value
+    if len(cache) > _ANALYSIS_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def analyze_access_patterns(schema: Dict[str, Any], summary_only: bool = False) -> Dict[str, Any]:
     """
     Comprehensive access pattern analysis for a schema.
+    With summary_only, only the summary block is computed and returned.
+    Results are cached per schema content and shared; do not mutate them.
     """
-    filtered_fields = analyze_field_access_patterns(schema)
-    array_updates = analyze_array_update_patterns(schema)
-    rare_fields = detect_rarely_queried_fields(schema)
-    write_patterns = analyze_collection_write_patterns(schema)
+    digest = _schema_digest(schema)
+    analysis = _cache_get(_analysis_cache, digest)
+    if analysis is not None:
+        return {"success": True, "summary": analysis["summary"]} if summary_only else analysis
+    
+    if summary_only:
+        analysis = _cache_get(_summary_cache, digest)
+        if analysis is None:
+            analysis = _analyze_access_patterns(schema, digest, summary_only=True)
+            _cache_put(_summary_cache, digest, analysis)
+        return analysis
+    
+    analysis = _analyze_access_patterns(schema, digest)
+    _cache_put(_analysis_cache, digest, analysis)
+    return analysis
+
+
+def _analyze_access_patterns(schema: Dict[str, Any], digest: bytes, summary_only: bool = False) -> Dict[str, Any]:
+    collections = _valid_collections(schema)
+    normalized = _cached_normalize_schema(schema, digest, collections)
+    rng = random.Random(_schema_seed(schema, digest))
+    filtered_fields = analyze_field_access_patterns(schema, normalized)
+    array_updates = analyze_array_update_patterns(schema, normalized, rng)
+    rare_fields = detect_rarely_queried_fields(schema, normalized, rng)
+    write_patterns = analyze_collection_write_patterns(schema, rng, collections)
+    fields_by_collection = _group_by_collection(filtered_fields)
+    field_index = _first_by_name(filtered_fields)
     
     # Generate specific index commands (with array field checking)
     index_commands = generate_index_commands(filtered_fields[:15], schema)
     
+    # Calculate improved coverage (compound indexes count for multiple fields)
+    coverage_analysis = calculate_improved_coverage(filtered_fields, index_commands)
+    
+    # NEW: Analyze index selectivity (cardinality)
+    selectivity_analysis = analyze_index_selectivity(filtered_fields, index_commands, field_index)
+    
+    # NEW: Generate shard key recommendations
+    shard_key_recommendations = generate_shard_key_recommendations(write_patterns, filtered_fields, fields_by_collection)
+    
+    # NEW: Project latency at 5M users
+    latency_projection = project_latency_at_scale(write_patterns, index_commands)
+    
+    summary = {
+        "total_fields_analyzed": len(filtered_fields),
+        "total_arrays": len(array_updates),
+        "total_collections": len(write_patterns),
+        "high_filter_fields": coverage_analysis["total_high_frequency_fields"],
+        "write_heavy_collections": len([w for w in write_patterns if w["write_percentage"] > 30]),
+        "recommended_indexes": len(index_commands),
+        "index_coverage_percent": coverage_analysis["coverage_percent"],
+        "weak_indexes": selectivity_analysis["weak_index_count"],
+        "sharding_candidates": len(shard_key_recommendations),
+        "scale_readiness": latency_projection["status"]
+    }
+    if summary_only:
+        return {"success": True, "summary": summary}
+    
     # Generate array growth projection (with 16MB limit)
     array_projection = generate_array_growth_projection(array_updates) if array_updates else None
     
@@ -1198,29 +1525,18 @@ def analyze_access_patterns(schema: Dict[str, Any]) -> Dict[str, Any]:
     # Calculate write amplification
     write_amplification = calculate_write_amplification(index_commands, write_patterns)
     
-    # Calculate improved coverage (compound indexes count for multiple fields)
-    coverage_analysis = calculate_improved_coverage(filtered_fields, index_commands)
-    
-    # NEW: Analyze index selectivity (cardinality)
-    selectivity_analysis = analyze_index_selectivity(filtered_fields, index_commands)
-    
-    # NEW: Generate shard key recommendations
-    shard_key_recommendations = generate_shard_key_recommendations(write_patterns, filtered_fields)
-    
-    # NEW: Project latency at 5M users
-    latency_projection = project_latency_at_scale(write_patterns, index_commands)
-    
     recommendations = generate_indexing_recommendations(
         filtered_fields,
         array_updates,
         rare_fields,
         write_patterns,
-        schema
+        schema,
+        index_commands
     )
     
     return {
         "success": True,
-        "most_filtered_fields": filtered_fields[:10],
+        "most_filtered_fields": [_public_record(f) for f in filtered_fields[:10]],
         "most_updated_arrays": array_updates[:8],
         "rarely_queried_fields": rare_fields[:10],
         "collection_write_patterns": write_patterns,
@@ -1234,16 +1550,5 @@ def analyze_access_patterns(schema: Dict[str, Any]) -> Dict[str, Any]:
         "shard_key_recommendations": shard_key_recommendations,
         "latency_projection": latency_projection,
         "recommendations": recommendations,
-        "summary": {
-            "total_fields_analyzed": len(filtered_fields),
-            "total_arrays": len(array_updates),
-            "total_collections": len(write_patterns),
-            "high_filter_fields": coverage_analysis["total_high_frequency_fields"],
-            "write_heavy_collections": len([w for w in write_patterns if w["write_percentage"] > 30]),
-            "recommended_indexes": len(index_commands),
-            "index_coverage_percent": coverage_analysis["coverage_percent"],
-            "weak_indexes": selectivity_analysis["weak_index_count"],
-            "sharding_candidates": len(shard_key_recommendations),
-            "scale_readiness": latency_projection["status"]
-        }
+        "summary": summary
     }
@@ -5,15 +5,19 @@ Production-ready architecture with structured validation and retry logic
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-import json
-import re
+import copy
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+
+import msgspec
 from groq import Groq
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, Field, ValidationError
 
 from ..config import settings
-from .schema_engine import generate_schema, apply_refinement
+from .schema_engine import SCHEMA_VERSION_KEYS, generate_schema, apply_refinement, stamp_schema_version
 
 # ============================================================
 # Configuration
@@ -21,9 +25,11 @@ from .schema_engine import generate_schema, apply_refinement
 
 MODEL_NAME = "llama-3.3-70b-versatile"  # Latest 70B model - best quality on free tier
 TEMPERATURE = 0.2  # Lower = more deterministic
-MAX_TOKENS = 3500
+MAX_TOKENS = 2000  # Schema itself is built locally, not generated
 MAX_HISTORY = 6  # Trim history to prevent bloat
 MAX_RETRIES = 2
+MAX_AGENTS = 1024  # Least recently used conversations are dropped beyond this
+RESPONSE_CACHE_SIZE = 512  # Successful responses kept for identical prompts
 
 
 # ============================================================
@@ -37,7 +43,7 @@ class SchemaAgentOutput(BaseModel):
     user_message: str
     decisions: Dict[str, str]
     relationships: Dict[str, str]
-    schema: Dict[str, Any]
+    schema: Dict[str, Any] = Field(default_factory=dict)  # Filled in by the schema engine
     explanations: Dict[str, str]
     warnings: List[str]
     indexes: List[Dict[str, Any]]
@@ -62,7 +68,6 @@ Output format:
   "relationships": {
     "Collection1 to Collection2": "SEPARATE/JUNCTION/EMBEDDED pattern"
   },
-  "schema": {full collections},
   "explanations": {detailed rationales},
   "warnings": [concerns],
   "indexes": [recommendations]
@@ -79,6 +84,107 @@ STRICT REQUIREMENTS:
 """
 
 
+# ============================================================
+# Streaming JSON Boundary Detection
+# ============================================================
+
+class _JsonObjectScanner:
+    """
+    Incrementally track brace depth to find where the first JSON object ends.
+
+    Braces inside JSON strings (including escaped quotes) are ignored, so a
+    completed object can be detected while the response is still streaming.
+    """
+
+    def __init__(self) -> None:
+        self.start = -1  # Offset of the opening brace
+        self.end = -1  # Offset just past the matching closing brace
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> bool:
+        """Scan the next chunk of text. Returns True once the object is closed."""
+        if self.end >= 0:
+            return True
+
+        depth, in_string, escape = self._depth, self._in_string, self._escape
+        for i, c in enumerate(text, self._pos):
+            if self.start < 0:
+                if c == "{":
+                    self.start = i
+                    depth = 1
+                continue
+            if escape:
+                escape = False
+            elif in_string:
+                if c == "\\":
+                    escape = True
+                elif c == '"':
+                    in_string = False
+            elif c == '"':
+                in_string = True
+            elif c == "{":
+                depth += 1
+            elif c == "}":
+                depth -= 1
+                if depth == 0:
+                    self.end = i + 1
+                    break
+
+        self._pos += len(text)
+        self._depth, self._in_string, self._escape = depth, in_string, escape
+        return self.end >= 0
+
+
+def _error_response(reasoning: str, user_message: str, warning: str) -> Dict[str, Any]:
+    """Fallback response in the SchemaAgentOutput shape, without a schema."""
+    return {
+        "reasoning": reasoning,
+        "action": "NONE",
+        "user_message": user_message,
+        "decisions": {},
+        "relationships": {},
+        "schema": None,
+        "explanations": {},
+        "warnings": [warning],
+        "indexes": []
+    }
+
+
+# ============================================================
+# Response Cache
+# ============================================================
+
+_response_cache: "OrderedDict[bytes, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def _response_key(messages: List[Dict[str, str]], current_schema: Optional[Dict[str, Any]]) -> bytes:
+    """Content hash of the full prompt and the schema being refined."""
+    payload = msgspec.json.encode([messages, current_schema], enc_hook=str, order="sorted")
+    return blake2b(payload, digest_size=16).digest()
+
+
+def _get_cached_response(key: bytes) -> Optional[Tuple[str, Dict[str, Any]]]:
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is not None:
+            _response_cache.move_to_end(key)
+        return cached
+
+
+def _cache_response(key: bytes, assistant_text: str, response: Dict[str, Any]) -> None:
+    # Version id and timestamp belong to one build; hits are stamped afresh
+    cached = copy.deepcopy(response)
+    cached["schema"] = {
+        key: value for key, value in cached["schema"].items() if key not in SCHEMA_VERSION_KEYS
+    }
+    with _response_cache_lock:
+        _response_cache[key] = (assistant_text, cached)
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
 
 
 # ============================================================
@@ -92,6 +198,8 @@ class SchemaDesignAgent:
         self.user_id = user_id
         self.client = Groq(api_key=settings.groq_api_key)
         self.history: List[Dict[str, str]] = []
+        # chat() runs in worker threads; one turn at a time per conversation
+        self._turn_lock = threading.Lock()
 
     # --------------------------------------------------------
     # History Management
@@ -108,8 +216,8 @@ class SchemaDesignAgent:
         self._trim_history()
 
     def get_conversation_history(self) -> List[Dict[str, str]]:
-        """Get full conversation history."""
-        return self.history.copy()
+        """Get full conversation history (shared with the agent; do not mutate)."""
+        return self.history
 
     # --------------------------------------------------------
     # Core Chat Logic with Retry
@@ -130,28 +238,54 @@ class SchemaDesignAgent:
         Returns:
             Validated schema response
         """
+        with self._turn_lock:
+            return self._chat_turn(user_message, current_schema)
+
+    def _chat_turn(
+        self,
+        user_message: str,
+        current_schema: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Run one conversation turn; callers must hold _turn_lock."""
         self.add_message("user", user_message)
 
         messages = [{"role": "system", "content": SYSTEM_PROMPT}]
         messages.extend(self.history)
 
+        # Identical prompt (same history and schema) already answered: skip the LLM
+        cache_key = _response_key(messages, current_schema)
+        cached = _get_cached_response(cache_key)
+        if cached is not None:
+            assistant_text, response = cached
+            self.add_message("assistant", assistant_text)
+            response = copy.deepcopy(response)
+            response["schema"] = stamp_schema_version(response["schema"], current_schema)
+            return response
+
         # Retry loop with automatic recovery
         for attempt in range(MAX_RETRIES + 1):
             try:
-                response = self.client.chat.completions.create(
-                    model=MODEL_NAME,
-                    temperature=TEMPERATURE,
-                    max_tokens=MAX_TOKENS,
-                    messages=messages,
-                )
-
-                assistant_text = response.choices[0].message.content.strip()
+                assistant_text = self._stream_completion(messages).strip()
                 self.add_message("assistant", assistant_text)
 
                 # Extract JSON from various formats
-                parsed = self._safe_json_extract(assistant_text)
-
-                if not parsed:
+                json_text = self._extract_json_object(assistant_text)
+
+                # Parse and validate with Pydantic in one pass
+                structured = None
+                if json_text:
+                    try:
+                        structured = SchemaAgentOutput.model_validate_json(json_text)
+                    except ValidationError as e:
+                        if e.errors()[0]["type"] != "json_invalid":
+                            if attempt < MAX_RETRIES:
+                                messages.append({
+                                    "role": "system",
+                                    "content": f"VALIDATION ERROR: {str(e)[:200]}. Fix and regenerate."
+                                })
+                            continue
+
+                if structured is None:
                     # Guide LLM to fix JSON on next attempt
                     if attempt < MAX_RETRIES:
                         messages.append({
@@ -160,17 +294,6 @@ class SchemaDesignAgent:
                         })
                     continue
 
-                # Validate with Pydantic
-                try:
-                    structured = SchemaAgentOutput(**parsed)
-                except ValidationError as e:
-                    if attempt < MAX_RETRIES:
-                        messages.append({
-                            "role": "system",
-                            "content": f"VALIDATION ERROR: {str(e)[:200]}. Fix and regenerate."
-                        })
-                    continue
-
                 # Hard validation rules - check before schema generation
                 if structured.action != "GENERATE_SCHEMA":
                     if attempt < MAX_RETRIES:
@@ -193,7 +316,7 @@ class SchemaDesignAgent:
                     if attempt < MAX_RETRIES:
                         messages.append({
                             "role": "system",
-                            "content": "ERROR: Missing required fields. Ensure all fields (reasoning, user_message, decisions, relationships, schema, explanations, warnings, indexes) are populated."
+                            "content": "ERROR: Missing required fields. Ensure all fields (reasoning, user_message, decisions, relationships, explanations, warnings, indexes) are populated."
                         })
                     continue
 
@@ -206,77 +329,97 @@ class SchemaDesignAgent:
                         })
                     continue
 
-                # Success! Generate final schema
-                if current_schema:
-                    final_schema = apply_refinement(
-                        base_result=current_schema,
-                        refinement_text=user_message,
-                        workload_type="balanced",
-                    )
-                else:
-                    final_schema = generate_schema(
-                        input_text=user_message,
-                        workload_type="balanced",
-                    )
-
-                structured.schema = final_schema
-                return structured.model_dump()
+                # Success! Generate final schema (only once the output is accepted,
+                # since the build makes its own LLM call)
+                structured.schema = self._build_schema(user_message, current_schema)
+                response = structured.model_dump()
+                _cache_response(cache_key, assistant_text, response)
+                return response
 
             except Exception as e:
                 if attempt == MAX_RETRIES:
-                    return {
-                        "reasoning": "Error occurred",
-                        "action": "NONE",
-                        "user_message": f"Error: {str(e)}",
-                        "decisions": {},
-                        "relationships": {},
-                        "schema": None,
-                        "explanations": {},
-                        "warnings": [f"Error: {str(e)}"],
-                        "indexes": []
-                    }
+                    return _error_response("Error occurred", f"Error: {str(e)}", f"Error: {str(e)}")
                 continue
 
         # All retries exhausted
-        return {
-            "reasoning": "Failed to generate valid schema",
-            "action": "NONE",
-            "user_message": "Could not generate valid schema after multiple attempts",
-            "decisions": {},
-            "relationships": {},
-            "schema": None,
-            "explanations": {},
-            "warnings": ["Failed to generate schema after retries"],
-            "indexes": []
-        }
+        return _error_response(
+            "Failed to generate valid schema",
+            "Could not generate valid schema after multiple attempts",
+            "Failed to generate schema after retries",
+        )
 
     # --------------------------------------------------------
-    # JSON Extraction
+    # Final Schema
+    # --------------------------------------------------------
+
+    def _build_schema(
+        self,
+        user_message: str,
+        current_schema: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Generate the final schema (or refine the current one) with the schema engine."""
+        if current_schema:
+            return apply_refinement(
+                base_result=current_schema,
+                refinement_text=user_message,
+                workload_type="balanced",
+            )
+        return generate_schema(
+            input_text=user_message,
+            workload_type="balanced",
+        )
+
+    # --------------------------------------------------------
+    # Streaming Completion
     # --------------------------------------------------------
 
-    def _safe_json_extract(self, text: str) -> Optional[Dict[str, Any]]:
+    def _stream_completion(self, messages: List[Dict[str, str]]) -> str:
         """
-        Safely extract JSON from various response formats.
-        
-        Attempts:
-        1. Direct JSON parse
-        2. Regex find JSON object
-        3. Return None if all fail
+        Stream a completion and stop as soon as the JSON object is closed.
+
+        Closing the stream early releases the connection and stops the model
+        from generating (and billing) tokens after the object we parse.
         """
-        # Try direct parse first
+        stream = self.client.chat.completions.create(
+            model=MODEL_NAME,
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            messages=messages,
+            stream=True,
+        )
+
+        parts: List[str] = []
+        scanner = _JsonObjectScanner()
         try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                if scanner.feed(delta):
+                    break
+        finally:
+            stream.close()
 
-        # Try regex extraction
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group(0))
-            except json.JSONDecodeError:
-                pass
+        return "".join(parts)
+
+    # --------------------------------------------------------
+    # JSON Extraction
+    # --------------------------------------------------------
 
+    def _extract_json_object(self, text: str) -> Optional[str]:
+        """
+        Locate the JSON object in various response formats.
+        
+        Handles bare JSON as well as JSON wrapped in markdown fences or
+        prose by returning the first balanced object, found in a single
+        linear pass. Returns None if there is no complete object.
+        """
+        scanner = _JsonObjectScanner()
+        if scanner.feed(text):
+            return text[scanner.start:scanner.end]
         return None
 
     # --------------------------------------------------------
@@ -292,16 +435,26 @@ class SchemaDesignAgent:
 # Agent Store (Swap with Redis in production)
 # ============================================================
 
-_user_agents: Dict[str, SchemaDesignAgent] = {}
+_user_agents: "OrderedDict[str, SchemaDesignAgent]" = OrderedDict()
+_user_agents_lock = threading.Lock()
 
 
 def get_or_create_agent(user_id: str) -> SchemaDesignAgent:
     """Get existing agent for user or create new one."""
-    if user_id not in _user_agents:
-        _user_agents[user_id] = SchemaDesignAgent(user_id)
-    return _user_agents[user_id]
+    with _user_agents_lock:
+        agent = _user_agents.get(user_id)
+        if agent is not None:
+            _user_agents.move_to_end(user_id)
+            return agent
+
+        agent = SchemaDesignAgent(user_id)
+        _user_agents[user_id] = agent
+        if len(_user_agents) > MAX_AGENTS:
+            _user_agents.popitem(last=False)
+        return agent
 
 
 def delete_agent(user_id: str) -> None:
     """Delete agent conversation history for a user."""
-    _user_agents.pop(user_id, None)
+    with _user_agents_lock:
+        _user_agents.pop(user_id, None)
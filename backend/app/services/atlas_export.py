@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List
+import hashlib
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import (
+    CollectionInvalid,
     ConfigurationError,
     ConnectionFailure,
     OperationFailure,
@@ -12,34 +17,124 @@ from pymongo.errors import (
 )
 
 
-async def validate_connection(connection_string: str, database_name: str) -> Dict[str, Any]:
+# Clients are reused across requests so repeat validations/exports skip the
+# TLS handshake, SRV lookup and topology discovery
+_CLIENT_IDLE_TTL_SECONDS = 300
+_MAX_CLIENTS = 32
+# One timeout per client so validation and export share it; validation
+# applies its own tighter bound per call
+_CLIENT_TIMEOUT_MS = 10000
+_VALIDATE_TIMEOUT_SECONDS = 5
+
+
+class _CachedClient:
+    """A shared client plus the number of requests currently using it."""
+    
+    __slots__ = ("client", "last_used", "in_use", "evicted")
+    
+    def __init__(self, client: AsyncIOMotorClient, now: float):
+        self.client = client
+        self.last_used = now
+        self.in_use = 0
+        self.evicted = False
+
+
+# Keyed on a digest of the connection string so credentials are not kept around
+_client_cache: "OrderedDict[bytes, _CachedClient]" = OrderedDict()
+
+
+def _retire(entry: _CachedClient) -> None:
+    """Drop a client from use; it is closed once no request holds it."""
+    entry.evicted = True
+    if entry.in_use == 0:
+        entry.client.close()
+
+
+@contextmanager
+def _leased_client(connection_string: str) -> Iterator[AsyncIOMotorClient]:
     """
-    Validate MongoDB Atlas connection string and check permissions.
-    Returns dict with success status and message.
+    Lease a shared client for the connection string, creating it if needed.
+    Clients idle longer than the TTL (or beyond the cache size) are evicted and
+    closed when their last lease is released.
     """
-    # Basic format validation
-    if not connection_string.startswith(("mongodb://", "mongodb+srv://")):
-        return {
-            "success": False,
-            "error": "Invalid connection string format. Must start with mongodb:// or mongodb+srv://"
-        }
+    now = time.monotonic()
     
-    client = None
+    # Entries are kept in last-used order, so expired ones are at the front
+    while _client_cache:
+        key, entry = next(iter(_client_cache.items()))
+        if now - entry.last_used < _CLIENT_IDLE_TTL_SECONDS:
+            break
+        del _client_cache[key]
+        _retire(entry)
+    
+    key = hashlib.sha256(connection_string.encode()).digest()
+    entry = _client_cache.get(key)
+    if entry is not None:
+        entry.last_used = now
+        _client_cache.move_to_end(key)
+    else:
+        entry = _CachedClient(
+            AsyncIOMotorClient(
+                connection_string,
+                serverSelectionTimeoutMS=_CLIENT_TIMEOUT_MS,
+                connectTimeoutMS=_CLIENT_TIMEOUT_MS,
+            ),
+            now,
+        )
+        _client_cache[key] = entry
+        if len(_client_cache) > _MAX_CLIENTS:
+            _retire(_client_cache.popitem(last=False)[1])
+    
+    entry.in_use += 1
     try:
-        # Create client with timeout
-        client = AsyncIOMotorClient(
-            connection_string,
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=5000,
+        yield entry.client
+    finally:
+        entry.in_use -= 1
+        if entry.evicted and entry.in_use == 0:
+            entry.client.close()
+
+
+def close_clients() -> None:
+    """Close every cached client. Called on application shutdown."""
+    while _client_cache:
+        _client_cache.popitem()[1].client.close()
+
+
+_REQUIRED_WRITE_ACTIONS = frozenset({"createCollection", "insert"})
+
+
+def _can_create_collections(privileges: List[Dict[str, Any]], database_name: str) -> bool:
+    """Check connectionStatus privileges for collection creation and inserts on the database."""
+    granted = set()
+    for privilege in privileges:
+        resource = privilege.get("resource", {})
+        applies = (
+            resource.get("anyResource")
+            or (resource.get("db") in ("", database_name) and resource.get("collection") == "")
         )
-        
-        # Test connection with ping
-        await client.admin.command("ping")
-        
-        # Check if database exists and is accessible
-        db = client[database_name]
-        
-        # Test write permission by creating and dropping a test collection
+        if applies:
+            granted.update(privilege.get("actions", ()))
+    return _REQUIRED_WRITE_ACTIONS <= granted
+
+
+async def _check_write_access(client: AsyncIOMotorClient, database_name: str) -> Dict[str, Any]:
+    """Confirm the connection works and the user can create collections in the database."""
+    # Test connection and fetch the authenticated user's privileges in one command
+    status = await client.admin.command("connectionStatus", showPrivileges=True)
+    
+    # Check if database exists and is accessible
+    db = client[database_name]
+    
+    # Check write permission from the privileges
+    auth_info = status.get("authInfo", {})
+    if auth_info.get("authenticatedUsers"):
+        if not _can_create_collections(auth_info.get("authenticatedUserPrivileges", []), database_name):
+            return {
+                "success": False,
+                "error": f"Insufficient permissions: user cannot create collections and insert into {database_name}"
+            }
+    else:
+        # No authenticated user (e.g. auth disabled): probe by creating and dropping a test collection
         test_collection_name = "__mongoarchitect_test__"
         try:
             await db.create_collection(test_collection_name)
@@ -49,18 +144,38 @@ async def validate_connection(connection_string: str, database_name: str) -> Dic
                 "success": False,
                 "error": f"Insufficient permissions: {str(e)}"
             }
-        
+    
+    return {
+        "success": True,
+        "message": "Connection validated successfully"
+    }
+
+
+async def validate_connection(connection_string: str, database_name: str) -> Dict[str, Any]:
+    """
+    Validate MongoDB Atlas connection string and check permissions.
+    Returns dict with success status and message.
+    """
+    # Basic format validation
+    if not connection_string.startswith(("mongodb://", "mongodb+srv://")):
         return {
-            "success": True,
-            "message": "Connection validated successfully"
+            "success": False,
+            "error": "Invalid connection string format. Must start with mongodb:// or mongodb+srv://"
         }
+    
+    try:
+        with _leased_client(connection_string) as client:
+            # Validation should answer quickly; bound it below the client's export timeout
+            return await asyncio.wait_for(
+                _check_write_access(client, database_name), _VALIDATE_TIMEOUT_SECONDS
+            )
         
     except ConfigurationError:
         return {
             "success": False,
             "error": "Invalid connection string configuration"
         }
-    except ServerSelectionTimeoutError:
+    except (ServerSelectionTimeoutError, asyncio.TimeoutError):
         return {
             "success": False,
             "error": "Connection timeout. Check if IP is whitelisted in Atlas or cluster is reachable"
@@ -80,9 +195,22 @@ async def validate_connection(connection_string: str, database_name: str) -> Dic
             "success": False,
             "error": f"Unexpected error: {str(e)}"
         }
-    finally:
-        if client:
-            client.close()
+
+
+# Map schema types to BSON types
+_BSON_TYPES = {
+    "objectid": "objectId",
+    "string": "string",
+    "number": "number",
+    "int": "int",
+    "integer": "int",
+    "double": "double",
+    "bool": "bool",
+    "boolean": "bool",
+    "date": "date",
+    "array": "array",
+    "object": "object",
+}
 
 
 def build_json_schema_validator(collection_name: str, fields: Dict[str, str]) -> Dict[str, Any]:
@@ -92,37 +220,23 @@ def build_json_schema_validator(collection_name: str, fields: Dict[str, str]) ->
     properties = {}
     required = []
     
-    # Map schema types to BSON types
-    type_mapping = {
-        "objectid": "objectId",
-        "string": "string",
-        "number": "number",
-        "int": "int",
-        "integer": "int",
-        "double": "double",
-        "bool": "bool",
-        "boolean": "bool",
-        "date": "date",
-        "array": "array",
-        "object": "object",
-    }
-    
     for field_name, field_type in fields.items():
         if field_name == "_id":
             # Skip _id as it's automatically managed by MongoDB
             continue
             
         # Clean up field type (remove "ref: xxx" annotations)
-        clean_type = field_type.lower().split("(")[0].strip()
+        type_lower = field_type.lower()
+        clean_type = type_lower.partition("(")[0].strip()
         
         # Map to BSON type
-        bson_type = type_mapping.get(clean_type, "string")
+        bson_type = _BSON_TYPES.get(clean_type, "string")
         
         properties[field_name] = {"bsonType": bson_type}
         
         # Add description for reference fields
-        if "(ref:" in field_type.lower():
-            ref_match = field_type.lower().split("ref:")[1].split(")")[0].strip()
+        if "(ref:" in type_lower:
+            ref_match = type_lower.split("ref:", 2)[1].partition(")")[0].strip()
             properties[field_name]["description"] = f"Reference to {ref_match} collection"
         
         # All fields are required by default (can be made optional later)
@@ -139,6 +253,39 @@ def build_json_schema_validator(collection_name: str, fields: Dict[str, str]) ->
     return validator
 
 
+_NAMESPACE_EXISTS = 48  # Server error code for creating an existing collection
+
+
+def _is_namespace_exists(outcome: Any) -> bool:
+    """Whether a create_collection outcome means the collection already existed."""
+    return isinstance(outcome, CollectionInvalid) or (
+        isinstance(outcome, OperationFailure) and outcome.code == _NAMESPACE_EXISTS
+    )
+
+
+async def _create_indexes(
+    db: Any,
+    specs: List[Tuple[str, str, int]],
+    errors: List[Dict[str, Any]]
+) -> List[Tuple[str, str]]:
+    """
+    Create single-field indexes concurrently.
+    Failures are recorded in errors; returns the (collection, field) pairs created.
+    """
+    results = await asyncio.gather(
+        *(db[collection_name].create_index([(field, direction)]) for collection_name, field, direction in specs),
+        return_exceptions=True,
+    )
+    
+    created = []
+    for (collection_name, field, _), outcome in zip(specs, results):
+        if isinstance(outcome, BaseException):
+            errors.append({"collection": collection_name, "op": "create_index", "field": field, "error": str(outcome)})
+        else:
+            created.append((collection_name, field))
+    return created
+
+
 async def export_schema_to_atlas(
     connection_string: str,
     database_name: str,
@@ -148,163 +295,161 @@ async def export_schema_to_atlas(
     Export generated schema to MongoDB Atlas.
     Creates collections with validators and indexes.
     """
-    client = None
     created_collections = []
     errors: List[Dict[str, Any]] = []
     
     try:
-        client = AsyncIOMotorClient(
-            connection_string,
-            serverSelectionTimeoutMS=10000,
-            connectTimeoutMS=10000,
-        )
-        
-        db = client[database_name]
-        result = schema_data.get("result", {})
-        
-        # Get the schema structure - it's stored in result.schema
-        schema = result.get("schema", {})
-        
-        if not schema:
-            return {
-                "success": False,
-                "error": "No schema found in data"
-            }
-        
-        # Get indexes if available
-        indexes = result.get("indexes", [])
-        
-        # Create collections with validators
-        for collection_name, fields in schema.items():
-            # Skip if not a dictionary (shouldn't happen but safety check)
-            if not isinstance(fields, dict):
-                continue
+        with _leased_client(connection_string) as client:
+            db = client[database_name]
+            result = schema_data.get("result", {})
             
-            # Check if collection already exists
-            existing_collections = await db.list_collection_names()
-            if collection_name in existing_collections:
-                created_collections.append({
-                    "name": collection_name,
-                    "status": "already_exists"
-                })
-                continue
+            # Get the schema structure - it's stored in result.schema
+            schema = result.get("schema", {})
             
-            # Build validator from fields
-            validator = build_json_schema_validator(collection_name, fields)
-
-            # Create collection with validator (capture errors per-collection)
-            try:
-                await db.create_collection(
+            if not schema:
+                return {
+                    "success": False,
+                    "error": "No schema found in data"
+                }
+            
+            # Get indexes if available
+            indexes = result.get("indexes", [])
+            
+            # Check which collections already exist in one round-trip; servers that
+            # accept create on an existing collection would otherwise report it as created
+            existing_collections = set(await db.list_collection_names())
+            
+            # Build validators and queue creation of every new collection
+            pending = []
+            create_ops = []
+            for collection_name, fields in schema.items():
+                # Skip if not a dictionary (shouldn't happen but safety check)
+                if not isinstance(fields, dict):
+                    continue
+                
+                pending.append((collection_name, fields))
+                if collection_name in existing_collections:
+                    continue
+                
+                # Build validator from fields
+                validator = build_json_schema_validator(collection_name, fields)
+                
+                create_ops.append(db.create_collection(
                     collection_name,
                     validator=validator,
                     validationLevel="moderate",
-                    validationAction="warn"
-                )
-
-                created_collections.append({
-                    "name": collection_name,
-                    "status": "created",
-                    "fields": len(fields)
-                })
-            except Exception as e:
-                err_msg = str(e)
-                created_collections.append({
-                    "name": collection_name,
-                    "status": "error",
-                    "error": err_msg
-                })
-                errors.append({"collection": collection_name, "op": "create_collection", "error": err_msg})
-                # continue attempting other collections
-                continue
-        
-        # Create indexes
-        created_indexes = []
-        
-        # Strategy 1: Use explicit indexes from result.indexes
-        for index_info in indexes:
-            # Parse index info (e.g., "users.email", "orders.userId")
-            if "." in index_info:
-                collection_name, field = index_info.split(".", 1)
-                
-                # Check if collection exists in schema
-                if collection_name not in schema:
-                    continue
+                    validationAction="warn",
+                    check_exists=False,  # Already listed above
+                ))
+            
+            # Create collections concurrently (capture errors per-collection)
+            results = iter(await asyncio.gather(*create_ops, return_exceptions=True))
+            for collection_name, fields in pending:
+                if collection_name in existing_collections:
+                    outcome = None
+                else:
+                    outcome = next(results)
                 
-                try:
-                    collection = db[collection_name]
-                    await collection.create_index([(field, 1)])
-                    created_indexes.append({
-                        "collection": collection_name,
-                        "field": field
+                # NamespaceExists covers a collection created since the listing
+                if collection_name in existing_collections or _is_namespace_exists(outcome):
+                    created_collections.append({
+                        "name": collection_name,
+                        "status": "already_exists"
+                    })
+                elif isinstance(outcome, BaseException):
+                    err_msg = str(outcome)
+                    created_collections.append({
+                        "name": collection_name,
+                        "status": "error",
+                        "error": err_msg
+                    })
+                    errors.append({"collection": collection_name, "op": "create_collection", "error": err_msg})
+                else:
+                    created_collections.append({
+                        "name": collection_name,
+                        "status": "created",
+                        "fields": len(fields)
                     })
-                except Exception as e:
-                    err_msg = str(e)
-                    errors.append({"collection": collection_name, "op": "create_index", "field": field, "error": err_msg})
-                    # continue creating other indexes
-                    pass
-        
-        # Strategy 2: Auto-create indexes for common patterns
-        for collection_name, fields in schema.items():
-            if not isinstance(fields, dict):
-                continue
-                
-            collection = db[collection_name]
             
-            # Index foreign key references (fields ending with Id or containing "ref:")
-            for field_name, field_type in fields.items():
-                if field_name == "_id":
-                    continue
+            # Create indexes
+            created_indexes = []
+            
+            # Strategy 1: Use explicit indexes from result.indexes
+            explicit_specs = []
+            for index_info in indexes:
+                # Parse index info (e.g., "users.email", "orders.userId")
+                if "." in index_info:
+                    collection_name, field = index_info.split(".", 1)
                     
-                # Check if it's a reference field
-                field_type_str = str(field_type).lower()
-                is_reference = (
-                    field_name.endswith("Id") or 
-                    field_name.endswith("_id") or
-                    "ref:" in field_type_str or
-                    "objectid" in field_type_str
-                )
-                
-                if is_reference and field_name not in [idx["field"] for idx in created_indexes if idx["collection"] == collection_name]:
-                    try:
-                        await collection.create_index([(field_name, 1)])
-                        created_indexes.append({
-                            "collection": collection_name,
-                            "field": field_name,
-                            "auto": True
-                        })
-                    except Exception as e:
-                        errors.append({"collection": collection_name, "op": "create_index", "field": field_name, "error": str(e)})
-                        pass
+                    # Check if collection exists in schema
+                    if collection_name not in schema:
+                        continue
+                    
+                    explicit_specs.append((collection_name, field, 1))
+            
+            # Fields already indexed (or planned) per collection
+            indexed: Dict[str, Set[str]] = defaultdict(set)
+            for collection_name, field in await _create_indexes(db, explicit_specs, errors):
+                created_indexes.append({
+                    "collection": collection_name,
+                    "field": field
+                })
+                indexed[collection_name].add(field)
+            
+            # Strategy 2: Auto-create indexes for common patterns
+            auto_specs = []
+            for collection_name, fields in schema.items():
+                if not isinstance(fields, dict):
+                    continue
+                collection_indexed = indexed[collection_name]
                 
-                # Index date fields for time-based queries
-                if "date" in field_type_str and field_name not in [idx["field"] for idx in created_indexes if idx["collection"] == collection_name]:
-                    try:
-                        await collection.create_index([(field_name, -1)])  # Descending for recent-first
-                        created_indexes.append({
-                            "collection": collection_name,
-                            "field": field_name,
-                            "auto": True
-                        })
-                    except Exception as e:
-                        errors.append({"collection": collection_name, "op": "create_index", "field": field_name, "error": str(e)})
-                        pass
-        
-        if errors:
+                # Index foreign key references (fields ending with Id or containing "ref:")
+                for field_name, field_type in fields.items():
+                    # Skip _id and fields that already have an index
+                    if field_name == "_id" or field_name in collection_indexed:
+                        continue
+                        
+                    # Check if it's a reference field
+                    field_type_str = str(field_type).lower()
+                    is_reference = (
+                        field_name.endswith("Id") or 
+                        field_name.endswith("_id") or
+                        "ref:" in field_type_str or
+                        "objectid" in field_type_str
+                    )
+                    
+                    if is_reference:
+                        auto_specs.append((collection_name, field_name, 1))
+                        collection_indexed.add(field_name)
+                    
+                    # Index date fields for time-based queries (descending for recent-first)
+                    elif "date" in field_type_str:
+                        auto_specs.append((collection_name, field_name, -1))
+                        collection_indexed.add(field_name)
+            
+            for collection_name, field_name in await _create_indexes(db, auto_specs, errors):
+                created_indexes.append({
+                    "collection": collection_name,
+                    "field": field_name,
+                    "auto": True
+                })
+            
+            if errors:
+                return {
+                    "success": False,
+                    "error": "One or more operations failed during export",
+                    "message": f"Export completed with errors to {database_name}",
+                    "collections": created_collections,
+                    "indexes": created_indexes,
+                    "errors": errors,
+                }
+
             return {
-                "success": False,
-                "error": "One or more operations failed during export",
-                "message": f"Export completed with errors to {database_name}",
+                "success": True,
+                "message": f"Successfully exported schema to {database_name}",
                 "collections": created_collections,
-                "indexes": created_indexes,
-                "errors": errors,
+                "indexes": created_indexes
             }
-
-        return {
-            "success": True,
-            "message": f"Successfully exported schema to {database_name}",
-            "collections": created_collections,
-            "indexes": created_indexes
-        }
         
     except Exception as e:
         return {
@@ -313,6 +458,3 @@ async def export_schema_to_atlas(
             "created_collections": created_collections,
             "errors": errors,
         }
-    finally:
-        if client:
-            client.close()
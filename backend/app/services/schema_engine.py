@@ -1311,6 +1311,15 @@ def _build_schema_version(base_result: Dict[str, Any] | None = None) -> Dict[str
     }
 
 
+SCHEMA_VERSION_KEYS = ("schemaVersion", "schemaVersionId", "previousVersionId", "createdAt")
+
+
+def stamp_schema_version(result: Dict[str, Any], base_result: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """Return a copy of a built result stamped as a new version of base_result."""
+    content = {key: value for key, value in result.items() if key not in SCHEMA_VERSION_KEYS}
+    return {**_build_schema_version(base_result), **content}
+
+
 def _normalize_type(value: Any) -> Any:
     if isinstance(value, str):
         lowered = value.strip().lower()
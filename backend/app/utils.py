@@ -6,10 +6,9 @@ from bson import ObjectId
 
 
 def to_object_id(value: str) -> ObjectId | None:
-    try:
-        return ObjectId(value)
-    except Exception:
+    if not ObjectId.is_valid(value):
         return None
+    return ObjectId(value)
 
 
 def serialize_doc(doc: Dict[str, Any] | None) -> Dict[str, Any] | None:
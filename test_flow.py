@@ -100,6 +100,45 @@ try:
         print(f"\n   Sample Explanation ({first_key}):")
         print(f"   {first_val[:100]}...")
     
+    # Step 5: Same prompt from another user (served from the agent's response
+    # cache) must still come back as a new schema version
+    print(f"\n5. Repeat Prompt From Second User...")
+    second_signup = requests.post(
+        f"{BASE_URL}/auth/signup",
+        json={"email": f"second{email}", "password": "TestPass123!"}
+    )
+    
+    if second_signup.status_code != 200:
+        print(f"   FAILED: {second_signup.status_code}")
+        print(f"   Response: {second_signup.text}")
+        exit(1)
+    
+    second_headers = {"Authorization": f"Bearer {second_signup.json()['access_token']}"}
+    repeat_resp = requests.post(
+        f"{BASE_URL}/agent/chat",
+        json={"message": message},
+        headers=second_headers,
+        timeout=45
+    )
+    
+    if repeat_resp.status_code != 200:
+        print(f"   FAILED: {repeat_resp.status_code}")
+        print(f"   Response: {repeat_resp.text}")
+        exit(1)
+    
+    repeat_schema = repeat_resp.json().get("schema") or {}
+    first_version_id = schema.get("schemaVersionId")
+    repeat_version_id = repeat_schema.get("schemaVersionId")
+    
+    print(f"   - First schemaVersionId: {first_version_id}")
+    print(f"   - Repeat schemaVersionId: {repeat_version_id}")
+    
+    if not repeat_version_id or repeat_version_id == first_version_id:
+        print(f"\n   ERROR: Repeated prompt reused schemaVersionId {first_version_id}")
+        exit(1)
+    
+    print(f"   SUCCESS")
+    
     print(f"\n" + "=" * 60)
     print("ALL TESTS PASSED!")
     print("=" * 60)